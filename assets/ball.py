@@ -4,15 +4,22 @@ import pygame
 
 from . import globals
 
-class Ball(pygame.sprite.Sprite):
-    def __init__(self):
+class Ball(pygame.sprite.DirtySprite):
+    def __init__(self, game_state):
         super().__init__()
+        self.game_state = game_state
         self.ball_size = globals.BALL_SIZE
         self.image = pygame.Surface([self.ball_size, self.ball_size])
         self.image.fill(globals.WHITE)
         self.rect = self.image.get_rect()
-        self.initial_speed = 2
-        self.velocity = [1,2] * self.initial_speed
+        # Built once so collide_mask doesn't rebuild it on every test
+        self.mask = pygame.mask.from_surface(self.image)
+        # The ball moves every frame, so dirty-rect rendering always redraws it
+        self.dirty = 2
+        self.initial_speed = globals.BALL_SPEED
+        # If you want to sped up ball after each bounce: change the percentage_speed_up {[0,1)}
+        self.percentage_speed_up = 0
+        self.velocity = [self.initial_speed, 2 * self.initial_speed]
         self.reset()
 
     def update(self, quantum_computer):
@@ -28,21 +35,31 @@ class Ball(pygame.sprite.Sprite):
         if self.rect.x < 0 or self.rect.x > globals.WINDOW_WIDTH - self.ball_size:
             self.velocity[0] = -self.velocity[0]
         
+        self.check_dropped()
+
+    def check_dropped(self):
         # Reset the ball if it gets out of the screen
         if self.rect.y > globals.FIELD_HEIGHT + self.ball_size:
             self.reset()
             # Increase the no. of ball dropped
-            globals.ball_dropped += 1
+            self.game_state.ball_dropped += 1
 
     def bounce(self):
-        # If you want to sped up ball after each bounce: change the percentage_speed_up {[0,1)}
-        percentage_speed_up = 0
+        percentage_speed_up = self.percentage_speed_up
         self.velocity[0] = self.velocity[0] * (1 + percentage_speed_up)
         self.velocity[1] = -self.velocity[1] * (1 + percentage_speed_up)
 
+    def reflect(self, flip_x, flip_y):
+        # Reverse the velocity along the normal of the surface hit, with the same speed-up as bounce
+        speed_up = 1 + self.percentage_speed_up
+        self.velocity[0] = (-self.velocity[0] if flip_x else self.velocity[0]) * speed_up
+        self.velocity[1] = (-self.velocity[1] if flip_y else self.velocity[1]) * speed_up
+
     def reset(self):
         self.rect.centerx = globals.PADDLE_WIDTH / 2
         self.rect.centery = globals.WINDOW_HEIGHT * 0.59
         
         # Always go upward when game starts/restarts
-        self.velocity = [-1, -2] * self.initial_speed
\ No newline at end of file
+        self.velocity = [-self.initial_speed, -2 * self.initial_speed]
+        # Sub-pixel position used by continuous collision detection
+        self.position = [float(self.rect.x), float(self.rect.y)]
\ No newline at end of file
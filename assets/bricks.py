@@ -1,8 +1,8 @@
 import pygame
-from . import globals
-from random import randint
+from . import globals, spatial
+import random
 
-class Brick(pygame.sprite.Sprite):
+class Brick(pygame.sprite.DirtySprite):
     def __init__(self, color=globals.WHITE, x=0, y=0):
         super().__init__()
         self.image = pygame.Surface([globals.BRICK_WIDTH, globals.BRICK_HEIGHT])
@@ -20,12 +20,42 @@ class Brick(pygame.sprite.Sprite):
     def pop():
         pass
 
+def rects_touch(rect_a, rect_b):
+    # Closed intervals: rects sharing only an edge still collide
+    return (rect_a.left <= rect_b.right and rect_b.left <= rect_a.right
+            and rect_a.top <= rect_b.bottom and rect_b.top <= rect_a.bottom)
+
+def brick_positions(x=7, y=120, layers=None):
+    """Top-left corners of the bricks, in the order BricksLayers creates them"""
+    # Read at call time so batch runs can override it
+    if layers is None:
+        layers = globals.NUMLAYERS
+    positions = []
+    for i in range(2 * int(globals.WINDOW_WIDTH / (globals.BRICK_WIDTH + globals.BRICK_X_GAP))):
+        for j in range(layers):
+            positions.append((x + i * globals.BRICK_X_GAP, y - j * globals.BRICK_HEIGHT - j * globals.BRICKS_Y_GAP))
+    return positions
+
 class BricksLayers:
-    def __init__(self, x=7, y=120, layers = globals.NUMLAYERS):
-        self.bricks = []
-        for i in range(2 * int(globals.WINDOW_WIDTH / (globals.BRICK_WIDTH + globals.BRICK_X_GAP))):
-            for j in range(layers):
-                # Create a random color
-                color = '#%06X' % randint(0, 0xFFFFFF)
-                # Add a brick to list
-                self.bricks.append(Brick(color, x + i * globals.BRICK_X_GAP, y - j * globals.BRICK_HEIGHT - j * globals.BRICKS_Y_GAP))
\ No newline at end of file
+    def __init__(self, x=7, y=120, layers=None, rng=random):
+        self.bricks = pygame.sprite.Group()
+        # Spatial index so collisions only test the bricks near the ball
+        self.spatial_grid = spatial.SpatialGrid(globals.BRICK_CELL_WIDTH, globals.BRICK_CELL_HEIGHT)
+        for brick_x, brick_y in brick_positions(x, y, layers):
+            # Create a random color
+            color = '#%06X' % rng.randint(0, 0xFFFFFF)
+            # Add a brick to list
+            self.add(Brick(color, brick_x, brick_y))
+
+    def add(self, brick):
+        self.bricks.add(brick)
+        self.spatial_grid.add(brick)
+
+    def remove(self, brick):
+        # Also takes the brick out of the scene's render groups
+        brick.kill()
+        self.spatial_grid.remove(brick)
+
+    def collide(self, rect):
+        """Return the bricks touching rect"""
+        return [brick for brick in self.spatial_grid.query(rect) if rects_touch(brick.rect, rect)]
@@ -1,8 +1,14 @@
+import bisect
+import logging
+
 import numpy as np
 import pygame
-import qiskit
 
-from . import globals, resources, node_types
+from . import globals, resources, node_types, optimizer
+
+# Input handlers report edits that can't be applied here, at debug level so
+# headless runs and environments stepping the grid don't flood stdout
+logger = logging.getLogger(__name__)
 
 GRID_WIDTH = 66
 GRID_HEIGHT = 66
@@ -10,6 +16,9 @@ GATE_TILE_WIDTH = 43
 GATE_TILE_HEIGHT = 45
 LINE_WIDTH = 1
 
+# rotation gates are turned in steps of this many radians
+ROTATION_STEP = np.pi / 8
+
 # navigation
 MOVE_LEFT = 1
 MOVE_RIGHT = 2
@@ -26,8 +35,17 @@ class CircuitGrid(pygame.sprite.RenderPlain):
         self.selected_wire = 0
         self.selected_column = 0
         self.model = CircuitGridModel(globals.NUM_QUBITS, 16)
-        self.circuit_grid_background = CircuitGridBackground(self.model)
-        self.circuit_grid_cursor = CircuitGridCursor()
+        # Shrink the rows when the wires would not fit below ypos
+        self.grid_height = min(
+            GRID_HEIGHT,
+            (globals.WINDOW_HEIGHT - ypos)
+            / (self.model.max_wires + GATE_TILE_HEIGHT / (2 * GRID_HEIGHT)),
+        )
+        self.scale = self.grid_height / GRID_HEIGHT
+        self.circuit_grid_background = CircuitGridBackground(
+            self.model, self.grid_height
+        )
+        self.circuit_grid_cursor = CircuitGridCursor(self.scale)
         self.gate_tiles = np.empty(
             (self.model.max_wires, self.model.max_columns), dtype=CircuitGridGate
         )
@@ -35,7 +53,7 @@ class CircuitGrid(pygame.sprite.RenderPlain):
         for row_idx in range(self.model.max_wires):
             for col_idx in range(self.model.max_columns):
                 self.gate_tiles[row_idx][col_idx] = CircuitGridGate(
-                    self.model, row_idx, col_idx
+                    self.model, row_idx, col_idx, self.scale
                 )
 
         pygame.sprite.RenderPlain.__init__(
@@ -44,36 +62,68 @@ class CircuitGrid(pygame.sprite.RenderPlain):
             self.gate_tiles,
             self.circuit_grid_cursor,
         )
-        self.update()
 
-    def update(self, *args):
-        sprite_list = self.sprites()
-        for sprite in sprite_list:
-            sprite.update()
+        # Cells whose tile must be refreshed, and screen areas to redraw, which
+        # are only collected with dirty-rect rendering
+        self.dirty_cells = set()
+        self.dirty_rects = []
+        self.model.add_listener(self.dirty_cells.update)
 
         self.circuit_grid_background.rect.left = self.xpos
         self.circuit_grid_background.rect.top = self.ypos
-
         for row_idx in range(self.model.max_wires):
             for col_idx in range(self.model.max_columns):
-                self.gate_tiles[row_idx][
-                    col_idx
-                ].rect.centerx = self.xpos + GRID_WIDTH * (col_idx + 1.5)
-                self.gate_tiles[row_idx][
-                    col_idx
-                ].rect.centery = self.ypos + GRID_HEIGHT * (row_idx + 1.0)
+                self.position_gate_tile(row_idx, col_idx)
+        self.highlight_selected_node(self.selected_wire, self.selected_column)
+
+    def position_gate_tile(self, row_idx, col_idx):
+        gate_tile = self.gate_tiles[row_idx][col_idx]
+        gate_tile.rect.centerx = self.xpos + GRID_WIDTH * (col_idx + 1.5)
+        gate_tile.rect.centery = self.ypos + self.grid_height * (row_idx + 1.0)
+
+    def update(self, *args):
+        """Refresh the tiles of the cells changed since the last update"""
+        for row_idx, col_idx in self.dirty_cells:
+            gate_tile = self.gate_tiles[row_idx][col_idx]
+            old_rect = gate_tile.rect
+            gate_tile.update()
+            self.position_gate_tile(row_idx, col_idx)
+            if globals.DIRTY_RECT_RENDERING:
+                self.dirty_rects.append(old_rect.union(gate_tile.rect))
+        self.dirty_cells.clear()
 
         self.highlight_selected_node(self.selected_wire, self.selected_column)
 
+    def pop_dirty_rects(self):
+        """Return the screen areas changed since the last call"""
+        dirty_rects = self.dirty_rects
+        self.dirty_rects = []
+        return dirty_rects
+
+    def draw_dirty(self, surface):
+        """Redraw only the areas changed since the last call and return them"""
+        dirty_rects = self.pop_dirty_rects()
+        for dirty_rect in dirty_rects:
+            surface.set_clip(dirty_rect)
+            for sprite in self.sprites():
+                if sprite.rect.colliderect(dirty_rect):
+                    surface.blit(sprite.image, sprite.rect)
+        surface.set_clip(None)
+        return dirty_rects
+
     def highlight_selected_node(self, wire_num, column_num):
         self.selected_wire = wire_num
         self.selected_column = column_num
+        old_rect = self.circuit_grid_cursor.rect.copy()
         self.circuit_grid_cursor.rect.left = self.xpos + GRID_WIDTH * (
             self.selected_column + 1
         )
-        self.circuit_grid_cursor.rect.top = self.ypos + GRID_HEIGHT * (
+        self.circuit_grid_cursor.rect.top = self.ypos + self.grid_height * (
             self.selected_wire + 0.5
         )
+        if globals.DIRTY_RECT_RENDERING and self.circuit_grid_cursor.rect != old_rect:
+            self.dirty_rects.append(old_rect)
+            self.dirty_rects.append(self.circuit_grid_cursor.rect.copy())
 
     def move_to_adjacent_node(self, direction):
         if direction == MOVE_LEFT and self.selected_column > 0:
@@ -120,9 +170,9 @@ class CircuitGrid(pygame.sprite.RenderPlain):
             case pygame.K_DOWN:
                 self.handle_input_move_ctrl(MOVE_DOWN),
             case pygame.K_LEFT:
-                self.handle_input_rotate(-np.pi / 8),
+                self.handle_input_rotate(-ROTATION_STEP),
             case pygame.K_RIGHT:
-                self.handle_input_rotate(np.pi / 8)
+                self.handle_input_rotate(ROTATION_STEP)
 
     def handle_input_x(self):
         selected_node_gate_part = self.get_selected_node_gate_part()
@@ -238,7 +288,7 @@ class CircuitGrid(pygame.sprite.RenderPlain):
                                 )
                                 == -1
                             ):
-                                print("Can't place control qubit")
+                                logger.debug("Can't place control qubit")
                                 self.display_exceptional_condition()
 
     def handle_input_move_ctrl(self, direction):
@@ -267,8 +317,8 @@ class CircuitGrid(pygame.sprite.RenderPlain):
                         self.place_ctrl_qubit(self.selected_wire, candidate_wire_num)
                         == candidate_wire_num
                     ):
-                        print(
-                            "control qubit successfully placed on wire ",
+                        logger.debug(
+                            "control qubit successfully placed on wire %d",
                             candidate_wire_num,
                         )
                         if (
@@ -303,8 +353,8 @@ class CircuitGrid(pygame.sprite.RenderPlain):
                                 )
                         self.update()
                     else:
-                        print(
-                            "control qubit could not be placed on wire ",
+                        logger.debug(
+                            "control qubit could not be placed on wire %d",
                             candidate_wire_num,
                         )
 
@@ -327,6 +377,9 @@ class CircuitGrid(pygame.sprite.RenderPlain):
 
         self.update()
 
+    def display_exceptional_condition(self):
+        """Feedback for an input that can't be applied: intentionally does nothing"""
+
     def place_ctrl_qubit(self, gate_wire_num, candidate_ctrl_wire_num):
         """Attempt to place a control qubit on a wire.
         If successful, return the wire number. If not, return -1
@@ -354,7 +407,9 @@ class CircuitGrid(pygame.sprite.RenderPlain):
             self.update()
             return candidate_ctrl_wire_num
         else:
-            print("Can't place control qubit on wire: ", candidate_ctrl_wire_num)
+            logger.debug(
+                "Can't place control qubit on wire: %d", candidate_ctrl_wire_num
+            )
             return -1
 
     def delete_controls_for_gate(self, gate_wire_num, column_num):
@@ -380,7 +435,7 @@ class CircuitGrid(pygame.sprite.RenderPlain):
                 min(gate_wire_num, control_wire_num),
                 max(gate_wire_num, control_wire_num) + 1,
             ):
-                print("Replacing wire ", wire_idx, " in column ", column_num)
+                logger.debug("Replacing wire %d in column %d", wire_idx, column_num)
                 circuit_grid_node = CircuitGridNode(node_types.EMPTY)
                 self.model.set_node(wire_idx, column_num, circuit_grid_node)
 
@@ -388,13 +443,13 @@ class CircuitGrid(pygame.sprite.RenderPlain):
 class CircuitGridBackground(pygame.sprite.Sprite):
     """Background for circuit grid"""
 
-    def __init__(self, circuit_grid_model):
+    def __init__(self, circuit_grid_model, grid_height=GRID_HEIGHT):
         pygame.sprite.Sprite.__init__(self)
 
         self.image = pygame.Surface(
             [
                 GRID_WIDTH * (circuit_grid_model.max_columns + 2),
-                GRID_HEIGHT * (circuit_grid_model.max_wires + 1),
+                grid_height * (circuit_grid_model.max_wires + 1),
             ]
         )
         self.image.convert()
@@ -406,8 +461,8 @@ class CircuitGridBackground(pygame.sprite.Sprite):
             pygame.draw.line(
                 self.image,
                 globals.BLACK,
-                (GRID_WIDTH * 0.5, (wire_num + 1) * GRID_HEIGHT),
-                (self.rect.width - (GRID_WIDTH * 0.5), (wire_num + 1) * GRID_HEIGHT),
+                (GRID_WIDTH * 0.5, (wire_num + 1) * grid_height),
+                (self.rect.width - (GRID_WIDTH * 0.5), (wire_num + 1) * grid_height),
                 LINE_WIDTH,
             )
 
@@ -415,11 +470,12 @@ class CircuitGridBackground(pygame.sprite.Sprite):
 class CircuitGridGate(pygame.sprite.Sprite):
     """Images for nodes"""
 
-    def __init__(self, circuit_grid_model, wire_num, column_num):
+    def __init__(self, circuit_grid_model, wire_num, column_num, scale=1):
         pygame.sprite.Sprite.__init__(self)
         self.circuit_grid_model = circuit_grid_model
         self.wire_num = wire_num
         self.column_num = column_num
+        self.gate_tile_atlas = get_gate_tile_atlas(scale)
 
         self.update()
 
@@ -429,134 +485,154 @@ class CircuitGridGate(pygame.sprite.Sprite):
         )
 
         if node_type == node_types.H:
-            self.image, self.rect = resources.load_image("gates/h_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/h_gate.png")
         elif node_type == node_types.X:
             node = self.circuit_grid_model.get_node(self.wire_num, self.column_num)
             if node.ctrl_a >= 0 or node.ctrl_b >= 0:
                 if self.wire_num > max(node.ctrl_a, node.ctrl_b):
-                    self.image, self.rect = resources.load_image(
-                        "gates/not_gate_below_ctrl.png", -1
+                    self.image = self.gate_tile_atlas.get(
+                        "gates/not_gate_below_ctrl.png"
                     )
                 else:
-                    self.image, self.rect = resources.load_image(
-                        "gates/not_gate_above_ctrl.png", -1
+                    self.image = self.gate_tile_atlas.get(
+                        "gates/not_gate_above_ctrl.png"
                     )
             elif node.radians != 0:
-                self.image, self.rect = resources.load_image("gates/rx_gate.png", -1)
-                # self.rect = self.image.get_rect()
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    0,
-                    node.radians % (2 * np.pi),
-                    6,
-                )
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    node.radians % (2 * np.pi),
-                    2 * np.pi,
-                    1,
+                self.image = self.gate_tile_atlas.get_rotation(
+                    "gates/rx_gate.png", node.radians
                 )
             else:
-                self.image, self.rect = resources.load_image("gates/x_gate.png", -1)
+                self.image = self.gate_tile_atlas.get("gates/x_gate.png")
         elif node_type == node_types.Y:
             node = self.circuit_grid_model.get_node(self.wire_num, self.column_num)
             if node.radians != 0:
-                self.image, self.rect = resources.load_image("gates/ry_gate.png", -1)
-                # self.rect = self.image.get_rect()
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    0,
-                    node.radians % (2 * np.pi),
-                    6,
-                )
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    node.radians % (2 * np.pi),
-                    2 * np.pi,
-                    1,
+                self.image = self.gate_tile_atlas.get_rotation(
+                    "gates/ry_gate.png", node.radians
                 )
             else:
-                self.image, self.rect = resources.load_image("gates/y_gate.png", -1)
+                self.image = self.gate_tile_atlas.get("gates/y_gate.png")
         elif node_type == node_types.Z:
             node = self.circuit_grid_model.get_node(self.wire_num, self.column_num)
             if node.radians != 0:
-                self.image, self.rect = resources.load_image("gates/rz_gate.png", -1)
-                self.rect = self.image.get_rect()
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    0,
-                    node.radians % (2 * np.pi),
-                    6,
-                )
-                pygame.draw.arc(
-                    self.image,
-                    globals.MAGENTA,
-                    self.rect,
-                    node.radians % (2 * np.pi),
-                    2 * np.pi,
-                    1,
+                self.image = self.gate_tile_atlas.get_rotation(
+                    "gates/rz_gate.png", node.radians
                 )
             else:
-                self.image, self.rect = resources.load_image("gates/z_gate.png", -1)
+                self.image = self.gate_tile_atlas.get("gates/z_gate.png")
         elif node_type == node_types.S:
-            self.image, self.rect = resources.load_image("gates/s_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/s_gate.png")
         elif node_type == node_types.SDG:
-            self.image, self.rect = resources.load_image("gates/sdg_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/sdg_gate.png")
         elif node_type == node_types.T:
-            self.image, self.rect = resources.load_image("gates/t_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/t_gate.png")
         elif node_type == node_types.TDG:
-            self.image, self.rect = resources.load_image("gates/tdg_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/tdg_gate.png")
         elif node_type == node_types.IDEN:
-            self.image, self.rect = resources.load_image("gates/iden_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/iden_gate.png")
         elif node_type == node_types.CTRL:
             if self.wire_num > self.circuit_grid_model.get_gate_wire_for_control_node(
                 self.wire_num, self.column_num
             ):
-                self.image, self.rect = resources.load_image(
-                    "gates/ctrl_gate_bottom_wire.png", -1
-                )
+                self.image = self.gate_tile_atlas.get("gates/ctrl_gate_bottom_wire.png")
             else:
-                self.image, self.rect = resources.load_image(
-                    "gates/ctrl_gate_top_wire.png", -1
-                )
+                self.image = self.gate_tile_atlas.get("gates/ctrl_gate_top_wire.png")
         elif node_type == node_types.TRACE:
-            self.image, self.rect = resources.load_image("gates/trace_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/trace_gate.png")
         elif node_type == node_types.SWAP:
-            self.image, self.rect = resources.load_image("gates/swap_gate.png", -1)
+            self.image = self.gate_tile_atlas.get("gates/swap_gate.png")
         else:
-            self.image = pygame.Surface([GATE_TILE_WIDTH, GATE_TILE_HEIGHT])
-            self.image.set_alpha(0)
-            self.rect = self.image.get_rect()
+            self.image = self.gate_tile_atlas.empty_tile
 
-        self.image.convert()
+        self.rect = self.image.get_rect()
+
+
+class GateTileAtlas:
+    """Gate tile images, loaded and converted once and shared by every tile"""
+
+    def __init__(self, scale=1):
+        self.tiles = {}
+        for name, image in resources.load_images("gates", -1).items():
+            if scale != 1:
+                image = pygame.transform.scale_by(image, scale)
+            if pygame.display.get_surface():
+                image = image.convert_alpha()
+            self.tiles[name] = image
+        self.empty_tile = pygame.Surface(
+            [GATE_TILE_WIDTH * scale, GATE_TILE_HEIGHT * scale]
+        )
+        self.empty_tile.set_alpha(0)
+        # Rotation gate tiles with their arc drawn, by (name, rotation step)
+        self.rotation_tiles = {}
+
+    def get(self, name):
+        return self.tiles[name]
+
+    def get_rotation(self, name, radians):
+        """Tile with an arc showing the angle, rounded to a multiple of ROTATION_STEP"""
+        num_steps = round(2 * np.pi / ROTATION_STEP)
+        step = round(radians / ROTATION_STEP) % num_steps
+        key = (name, step)
+        if key not in self.rotation_tiles:
+            image = self.tiles[name].copy()
+            rect = image.get_rect()
+            angle = step * ROTATION_STEP
+            pygame.draw.arc(image, globals.MAGENTA, rect, 0, angle, 6)
+            pygame.draw.arc(image, globals.MAGENTA, rect, angle, 2 * np.pi, 1)
+            self.rotation_tiles[key] = image
+        return self.rotation_tiles[key]
+
+
+gate_tile_atlases = {}
+
+
+def get_gate_tile_atlas(scale=1):
+    """Atlas shared by every tile drawn at the given scale"""
+    if scale not in gate_tile_atlases:
+        gate_tile_atlases[scale] = GateTileAtlas(scale)
+    return gate_tile_atlases[scale]
 
 
 class CircuitGridCursor(pygame.sprite.Sprite):
     """Cursor to highlight current grid node"""
 
-    def __init__(self):
+    def __init__(self, scale=1):
         pygame.sprite.Sprite.__init__(self)
         self.image, self.rect = resources.load_image("circuit-grid-cursor.png")
+        if scale != 1:
+            self.image = pygame.transform.scale_by(self.image, scale)
+            self.rect = self.image.get_rect()
         self.image.convert_alpha()
 
 
 class CircuitGridModel:
-    """Grid-based model that is built when user interacts with circuit"""
+    """Grid-based model that is built when user interacts with circuit
+
+    Nodes are stored as parallel arrays indexed by (wire, column): the
+    node_types, ctrl_a, ctrl_b and swap rows of one int8 array, and a
+    radians array. Empty cells are (EMPTY, 0.0, -1, -1, -1). get_node and
+    set_node convert to and from CircuitGridNode.
+    """
 
     def __init__(self, max_wires, max_columns):
         self.max_wires = max_wires
         self.max_columns = max_columns
-        self.nodes = np.empty((max_wires, max_columns), dtype=CircuitGridNode)
+        self.node_data = np.full((4, max_wires, max_columns), -1, dtype=np.int8)
+        self.node_types, self.ctrl_a, self.ctrl_b, self.swap = self.node_data
+        self.radians = np.zeros((max_wires, max_columns))
+        # Per column, the wires of the gates whose control or swap part is on
+        # each wire, kept sorted and up to date by set_node
+        self.control_gate_wires = [{} for _ in range(max_columns)]
+        self.swap_gate_wires = [{} for _ in range(max_columns)]
+        # Incremented on every change to the grid, and to each of its columns
+        self.revision = 0
+        self.column_revisions = [0] * max_columns
+        self._key = None
+        self._key_revision = -1
+        self._column_keys = [None] * max_columns
+        self._column_key_revisions = [-1] * max_columns
+        self._node_array = None
+        self._node_array_revision = -1
+        self.listeners = []
 
     def __str__(self):
         retval = ""
@@ -566,145 +642,300 @@ class CircuitGridModel:
                 retval += str(self.get_node_gate_part(wire_num, column_num)) + ", "
         return "CircuitGridModel: " + retval
 
+    def add_listener(self, listener):
+        """Call listener with the list of (wire, column) cells affected by each edit"""
+        self.listeners.append(listener)
+
     def set_node(self, wire_num, column_num, circuit_grid_node):
-        self.nodes[wire_num][column_num] = CircuitGridNode(
-            circuit_grid_node.node_type,
-            circuit_grid_node.radians,
+        old_parts = tuple(
+            int(wires[wire_num, column_num]) for wires in self.node_data[1:]
+        )
+        new_parts = (
             circuit_grid_node.ctrl_a,
             circuit_grid_node.ctrl_b,
             circuit_grid_node.swap,
         )
+        self.node_data[:, wire_num, column_num] = (
+            circuit_grid_node.node_type,
+        ) + new_parts
+        self.radians[wire_num, column_num] = circuit_grid_node.radians
+        self.update_gate_wires(wire_num, column_num, old_parts, new_parts)
+        self.revision += 1
+        self.column_revisions[column_num] += 1
+
+        if self.listeners:
+            # Control and swap parts of the gate are shown on other wires
+            changed_wires = {wire_num}
+            changed_wires.update(wire for wire in old_parts + new_parts if wire >= 0)
+            changed_cells = [(wire, column_num) for wire in sorted(changed_wires)]
+            for listener in self.listeners:
+                listener(changed_cells)
+
+    def update_gate_wires(self, wire_num, column_num, old_parts, new_parts):
+        """Move the index entries of the gate on wire_num from its old
+        (ctrl_a, ctrl_b, swap) wires to its new ones"""
+        for gate_wires, get_part_wires in (
+            (self.control_gate_wires[column_num], get_control_wires),
+            (self.swap_gate_wires[column_num], get_swap_wires),
+        ):
+            for part_wire in get_part_wires(old_parts, wire_num):
+                gate_wires[part_wire].remove(wire_num)
+                if not gate_wires[part_wire]:
+                    del gate_wires[part_wire]
+            for part_wire in get_part_wires(new_parts, wire_num):
+                bisect.insort(gate_wires.setdefault(part_wire, []), wire_num)
+
+    def get_key(self):
+        """Hashable bytes describing the grid content, recomputed only after edits"""
+        if self._key_revision != self.revision:
+            self._key = (
+                bytes((self.max_wires, self.max_columns))
+                + self.node_data.tobytes()
+                + self.radians.tobytes()
+            )
+            self._key_revision = self.revision
+        return self._key
+
+    def get_column_key(self, column_num):
+        """Hashable bytes describing one column, recomputed only after it is edited"""
+        if self._column_key_revisions[column_num] != self.column_revisions[column_num]:
+            self._column_keys[column_num] = (
+                self.node_data[:, :, column_num].tobytes()
+                + self.radians[:, column_num].tobytes()
+            )
+            self._column_key_revisions[column_num] = self.column_revisions[column_num]
+        return self._column_keys[column_num]
+
+    def get_node_array(self):
+        """Grid as an int array of (node_type, rotation steps, ctrl_a, ctrl_b, swap) per node
+
+        Rotations are counted in ROTATION_STEP increments and empty cells are
+        (EMPTY, 0, -1, -1, -1). The array is rebuilt only after edits, so it
+        is read-only.
+        """
+        if self._node_array_revision != self.revision:
+            node_array = np.stack(
+                (
+                    self.node_types,
+                    np.round(self.radians / ROTATION_STEP).astype(np.int8),
+                    self.ctrl_a,
+                    self.ctrl_b,
+                    self.swap,
+                ),
+                axis=-1,
+            )
+            node_array.flags.writeable = False
+            self._node_array = node_array
+            self._node_array_revision = self.revision
+        return self._node_array
+
+    def snapshot(self):
+        """Copy of the model that later edits to this one do not affect"""
+        circuit_grid_model = CircuitGridModel(self.max_wires, self.max_columns)
+        circuit_grid_model.node_data = self.node_data.copy()
+        (
+            circuit_grid_model.node_types,
+            circuit_grid_model.ctrl_a,
+            circuit_grid_model.ctrl_b,
+            circuit_grid_model.swap,
+        ) = circuit_grid_model.node_data
+        circuit_grid_model.radians = self.radians.copy()
+        for column_num in range(self.max_columns):
+            for indices in ("control_gate_wires", "swap_gate_wires"):
+                getattr(circuit_grid_model, indices)[column_num] = {
+                    part_wire: list(gate_wires)
+                    for part_wire, gate_wires in getattr(self, indices)[
+                        column_num
+                    ].items()
+                }
+        circuit_grid_model.revision = self.revision
+        circuit_grid_model.column_revisions = list(self.column_revisions)
+        return circuit_grid_model
 
     def get_node(self, wire_num, column_num):
-        return self.nodes[wire_num][column_num]
+        """Return the node as a CircuitGridNode, or None for an empty cell
+
+        Edit the node and pass it to set_node to change the grid.
+        """
+        node_type = self.node_types[wire_num, column_num]
+        if (
+            node_type == node_types.EMPTY
+            and (self.node_data[1:, wire_num, column_num] == -1).all()
+            and self.radians[wire_num, column_num] == 0
+        ):
+            return None
+        return CircuitGridNode(
+            int(node_type),
+            float(self.radians[wire_num, column_num]),
+            int(self.ctrl_a[wire_num, column_num]),
+            int(self.ctrl_b[wire_num, column_num]),
+            int(self.swap[wire_num, column_num]),
+        )
 
     def get_node_gate_part(self, wire_num, column_num):
-        requested_node = self.nodes[wire_num][column_num]
-        if requested_node and requested_node.node_type != node_types.EMPTY:
+        node_type = self.node_types[wire_num, column_num]
+        if node_type != node_types.EMPTY:
             # Node is occupied so return its gate
-            return requested_node.node_type
+            return int(node_type)
         else:
-            # Check for control nodes from gates in other nodes in this column
-            nodes_in_column = self.nodes[:, column_num]
-            for idx in range(self.max_wires):
-                if idx != wire_num:
-                    other_node = nodes_in_column[idx]
-                    if other_node:
-                        if (
-                            other_node.ctrl_a == wire_num
-                            or other_node.ctrl_b == wire_num
-                        ):
-                            return node_types.CTRL
-                        elif other_node.swap == wire_num:
-                            return node_types.SWAP
+            # Check for control and swap parts of gates on other wires in this
+            # column, the gate on the lowest wire winning
+            control_gate_wires = self.control_gate_wires[column_num].get(wire_num)
+            swap_gate_wires = self.swap_gate_wires[column_num].get(wire_num)
+            if control_gate_wires and (
+                not swap_gate_wires or control_gate_wires[0] <= swap_gate_wires[0]
+            ):
+                return node_types.CTRL
+            elif swap_gate_wires:
+                return node_types.SWAP
 
         return node_types.EMPTY
 
     def get_gate_wire_for_control_node(self, control_wire_num, column_num):
         """Get wire for gate that belongs to a control node on the given wire"""
-        gate_wire_num = -1
-        nodes_in_column = self.nodes[:, column_num]
-        for wire_idx in range(self.max_wires):
-            if wire_idx != control_wire_num:
-                other_node = nodes_in_column[wire_idx]
-                if other_node:
-                    if (
-                        other_node.ctrl_a == control_wire_num
-                        or other_node.ctrl_b == control_wire_num
-                    ):
-                        gate_wire_num = wire_idx
-                        print(
-                            "Found gate: ",
-                            self.get_node_gate_part(gate_wire_num, column_num),
-                            " on wire: ",
-                            gate_wire_num,
-                        )
-        return gate_wire_num
+        gate_wires = self.control_gate_wires[column_num].get(control_wire_num)
+        if gate_wires:
+            return gate_wires[-1]
+        return -1
 
-    def compute_circuit(self):
-        qr = qiskit.QuantumRegister(self.max_wires, "q")
-        qc = qiskit.QuantumCircuit(qr)
+    def compute_operations(self):
+        """List the gates of the circuit as (gate name, radians, wires) tuples
 
+        Gate names follow the QuantumCircuit method names, and wires are
+        ordered controls first, then targets.
+        """
+        operations = []
         for column_num in range(self.max_columns):
-            for wire_num in range(self.max_wires):
-                node = self.nodes[wire_num][column_num]
-                if node:
-                    if node.node_type == node_types.IDEN:
-                        # Identity gate
-                        qc.i(qr[wire_num])
-                    elif node.node_type == node_types.X:
-                        if node.radians == 0:
-                            if node.ctrl_a != -1:
-                                if node.ctrl_b != -1:
-                                    # Toffoli gate
-                                    qc.ccx(
-                                        qr[node.ctrl_a], qr[node.ctrl_b], qr[wire_num]
+            operations.extend(self.compute_column_operations(column_num))
+        return operations
+
+    def compute_column_operations(self, column_num):
+        """List the gates of one column, in the format of compute_operations"""
+        operations = []
+
+        for wire_num in range(self.max_wires):
+            node = self.get_node(wire_num, column_num)
+            if node:
+                if node.node_type == node_types.IDEN:
+                    # Identity gate
+                    operations.append(("i", None, (wire_num,)))
+                elif node.node_type == node_types.X:
+                    if node.radians == 0:
+                        if node.ctrl_a != -1:
+                            if node.ctrl_b != -1:
+                                # Toffoli gate
+                                operations.append(
+                                    (
+                                        "ccx",
+                                        None,
+                                        (node.ctrl_a, node.ctrl_b, wire_num),
                                     )
-                                else:
-                                    # Controlled X gate
-                                    qc.cx(qr[node.ctrl_a], qr[wire_num])
-                            else:
-                                # Pauli-X gate
-                                qc.x(qr[wire_num])
-                        else:
-                            # Rotation around X axis
-                            qc.rx(node.radians, qr[wire_num])
-                    elif node.node_type == node_types.Y:
-                        if node.radians == 0:
-                            if node.ctrl_a != -1:
-                                # Controlled Y gate
-                                qc.cy(qr[node.ctrl_a], qr[wire_num])
+                                )
                             else:
-                                # Pauli-Y gate
-                                qc.y(qr[wire_num])
+                                # Controlled X gate
+                                operations.append(("cx", None, (node.ctrl_a, wire_num)))
                         else:
-                            # Rotation around Y axis
-                            qc.ry(node.radians, qr[wire_num])
-                    elif node.node_type == node_types.Z:
-                        if node.radians == 0:
-                            if node.ctrl_a != -1:
-                                # Controlled Z gate
-                                qc.cz(qr[node.ctrl_a], qr[wire_num])
-                            else:
-                                # Pauli-Z gate
-                                qc.z(qr[wire_num])
+                            # Pauli-X gate
+                            operations.append(("x", None, (wire_num,)))
+                    else:
+                        # Rotation around X axis
+                        operations.append(("rx", node.radians, (wire_num,)))
+                elif node.node_type == node_types.Y:
+                    if node.radians == 0:
+                        if node.ctrl_a != -1:
+                            # Controlled Y gate
+                            operations.append(("cy", None, (node.ctrl_a, wire_num)))
                         else:
-                            if node.ctrl_a != -1:
-                                # Controlled rotation around the Z axis
-                                qc.crz(node.radians, qr[node.ctrl_a], qr[wire_num])
-                            else:
-                                # Rotation around Z axis
-                                qc.rz(node.radians, qr[wire_num])
-                    elif node.node_type == node_types.S:
-                        # S gate
-                        qc.s(qr[wire_num])
-                    elif node.node_type == node_types.SDG:
-                        # S dagger gate
-                        qc.sdg(qr[wire_num])
-                    elif node.node_type == node_types.T:
-                        # T gate
-                        qc.t(qr[wire_num])
-                    elif node.node_type == node_types.TDG:
-                        # T dagger gate
-                        qc.tdg(qr[wire_num])
-                    elif node.node_type == node_types.H:
+                            # Pauli-Y gate
+                            operations.append(("y", None, (wire_num,)))
+                    else:
+                        # Rotation around Y axis
+                        operations.append(("ry", node.radians, (wire_num,)))
+                elif node.node_type == node_types.Z:
+                    if node.radians == 0:
                         if node.ctrl_a != -1:
-                            # Controlled Hadamard
-                            qc.ch(qr[node.ctrl_a], qr[wire_num])
+                            # Controlled Z gate
+                            operations.append(("cz", None, (node.ctrl_a, wire_num)))
                         else:
-                            # Hadamard gate
-                            qc.h(qr[wire_num])
-                    elif node.node_type == node_types.SWAP:
+                            # Pauli-Z gate
+                            operations.append(("z", None, (wire_num,)))
+                    else:
                         if node.ctrl_a != -1:
-                            # Controlled Swap
-                            qc.cswap(qr[node.ctrl_a], qr[wire_num], qr[node.swap])
+                            # Controlled rotation around the Z axis
+                            operations.append(
+                                ("crz", node.radians, (node.ctrl_a, wire_num))
+                            )
                         else:
-                            # Swap gate
-                            qc.swap(qr[wire_num], qr[node.swap])
+                            # Rotation around Z axis
+                            operations.append(("rz", node.radians, (wire_num,)))
+                elif node.node_type == node_types.S:
+                    # S gate
+                    operations.append(("s", None, (wire_num,)))
+                elif node.node_type == node_types.SDG:
+                    # S dagger gate
+                    operations.append(("sdg", None, (wire_num,)))
+                elif node.node_type == node_types.T:
+                    # T gate
+                    operations.append(("t", None, (wire_num,)))
+                elif node.node_type == node_types.TDG:
+                    # T dagger gate
+                    operations.append(("tdg", None, (wire_num,)))
+                elif node.node_type == node_types.H:
+                    if node.ctrl_a != -1:
+                        # Controlled Hadamard
+                        operations.append(("ch", None, (node.ctrl_a, wire_num)))
+                    else:
+                        # Hadamard gate
+                        operations.append(("h", None, (wire_num,)))
+                elif node.node_type == node_types.SWAP:
+                    if node.ctrl_a != -1:
+                        # Controlled Swap
+                        operations.append(
+                            ("cswap", None, (node.ctrl_a, wire_num, node.swap))
+                        )
+                    else:
+                        # Swap gate
+                        operations.append(("swap", None, (wire_num, node.swap)))
+
+        return operations
+
+    def compute_optimized_operations(self):
+        """compute_operations simplified by optimizer.optimize, and the number of gates removed"""
+        return optimizer.optimize(self.compute_operations())
+
+    def compute_circuit(self, operations=None):
+        """Build the QuantumCircuit of operations, by default those of compute_operations"""
+        # Imported here, as importing Qiskit takes seconds and only the
+        # Qiskit engine needs circuits
+        import qiskit
+
+        if operations is None:
+            operations = self.compute_operations()
+        qr = qiskit.QuantumRegister(self.max_wires, "q")
+        qc = qiskit.QuantumCircuit(qr)
+
+        for gate, radians, wires in operations:
+            qubits = [qr[wire_num] for wire_num in wires]
+            if radians is None:
+                getattr(qc, gate)(*qubits)
+            else:
+                getattr(qc, gate)(radians, *qubits)
 
         return qc
 
 
+def get_control_wires(parts, wire_num):
+    """Wires other than wire_num holding a control part of a gate's (ctrl_a, ctrl_b, swap)"""
+    return {parts[0], parts[1]} - {-1, wire_num}
+
+
+def get_swap_wires(parts, wire_num):
+    """Wire other than wire_num holding the swap part of a gate's (ctrl_a, ctrl_b, swap)"""
+    if parts[2] in (-1, wire_num):
+        return ()
+    return (parts[2],)
+
+
 class CircuitGridNode:
     """Represents a node in the circuit grid"""
 
@@ -715,6 +946,11 @@ class CircuitGridNode:
         self.ctrl_b = ctrl_b
         self.swap = swap
 
+    def copy(self):
+        return CircuitGridNode(
+            self.node_type, self.radians, self.ctrl_a, self.ctrl_b, self.swap
+        )
+
     def __str__(self):
         string = "type: " + str(self.node_type)
         string += ", radians: " + str(self.radians) if self.radians != 0 else ""
@@ -0,0 +1,151 @@
+import math
+
+import pygame
+
+from . import globals
+
+# Bounces resolved within one move before the rest of it is dropped
+MAX_BOUNCES = 16
+
+# Hits this close in time are treated as simultaneous
+TIME_EPSILON = 1e-9
+
+
+def sweep(x, y, width, height, dx, dy, rect):
+    """First contact of a box moving by (dx, dy) with rect
+
+    Returns (time, normal_x, normal_y) where time is the fraction of the
+    move at which the box first touches rect and the normal is the outward
+    normal of the face it hits, or None if it doesn't hit rect during the
+    move. A box that already overlaps rect, or only grazes an edge or
+    corner, does not hit it.
+    """
+    if dx > 0:
+        x_entry = (rect.left - (x + width)) / dx
+        x_exit = (rect.right - x) / dx
+    elif dx < 0:
+        x_entry = (rect.right - x) / dx
+        x_exit = (rect.left - (x + width)) / dx
+    elif x + width <= rect.left or x >= rect.right:
+        return None
+    else:
+        x_entry, x_exit = -math.inf, math.inf
+
+    if dy > 0:
+        y_entry = (rect.top - (y + height)) / dy
+        y_exit = (rect.bottom - y) / dy
+    elif dy < 0:
+        y_entry = (rect.bottom - y) / dy
+        y_exit = (rect.top - (y + height)) / dy
+    elif y + height <= rect.top or y >= rect.bottom:
+        return None
+    else:
+        y_entry, y_exit = -math.inf, math.inf
+
+    entry = max(x_entry, y_entry)
+    if entry >= min(x_exit, y_exit) or entry < 0 or entry > 1:
+        return None
+    if x_entry > y_entry:
+        return entry, -math.copysign(1, dx), 0
+    if y_entry > x_entry:
+        return entry, 0, -math.copysign(1, dy)
+    # Exactly on a corner: bounce back along both axes
+    return entry, -math.copysign(1, dx), -math.copysign(1, dy)
+
+
+def sweep_walls(x, y, size, dx, dy):
+    """First contact of the ball with the left, right or top wall, as sweep() returns"""
+    # A ball already past a wall bounces off it at once
+    hits = []
+    if dx < 0 and x + dx < 0:
+        hits.append((max(0, -x / dx), 1, 0))
+    elif dx > 0 and x + dx > globals.WINDOW_WIDTH - size:
+        hits.append((max(0, (globals.WINDOW_WIDTH - size - x) / dx), -1, 0))
+    if dy < 0 and y + dy < 0:
+        hits.append((max(0, -y / dy), 0, 1))
+    if not hits:
+        return None
+    return min(hits)
+
+
+def move_ball(
+    ball, brick_layers, get_paddle, measurement_line, on_measurement_line, dt=1
+):
+    """Move the ball by dt frames of its velocity, bouncing off whatever it reaches first
+
+    The move is split at every contact with a wall, a standing brick or the
+    paddle returned by get_paddle(), and the velocity is reflected about the
+    normal of the face hit, so the ball can't pass through anything however
+    far it moves. on_measurement_line() is called when the ball crosses
+    measurement_line downwards. Returns the bricks hit, which the caller
+    removes and scores.
+    """
+    size = ball.rect.width
+    # Sub-pixel position, resynced when the rect was moved elsewhere
+    if (round(ball.position[0]), round(ball.position[1])) != ball.rect.topleft:
+        ball.position = [float(ball.rect.x), float(ball.rect.y)]
+    x, y = ball.position
+    remaining = dt
+    hit_bricks = []
+
+    for _ in range(MAX_BOUNCES):
+        dx = ball.velocity[0] * remaining
+        dy = ball.velocity[1] * remaining
+        if dx == 0 and dy == 0:
+            break
+
+        contacts = []
+        wall = sweep_walls(x, y, size, dx, dy)
+        if wall:
+            contacts.append(wall + (None,))
+        paddle = get_paddle()
+        if paddle:
+            contact = sweep(x, y, size, size, dx, dy, paddle.rect)
+            if contact:
+                contacts.append(contact + (None,))
+        swept_rect = pygame.Rect(
+            math.floor(min(x, x + dx)),
+            math.floor(min(y, y + dy)),
+            math.ceil(abs(dx)) + size + 1,
+            math.ceil(abs(dy)) + size + 1,
+        )
+        for brick in brick_layers.spatial_grid.query(swept_rect):
+            if brick not in hit_bricks:
+                contact = sweep(x, y, size, size, dx, dy, brick.rect)
+                if contact:
+                    contacts.append(contact + (brick,))
+
+        # Measure before reaching the paddles, which may change the paddle
+        if dy > 0 and y <= measurement_line < y + dy:
+            crossing = (measurement_line - y) / dy
+            if not contacts or crossing < min(contact[0] for contact in contacts):
+                # Step just past the line so the measurement sees the ball below it
+                x += dx * crossing
+                y = math.nextafter(measurement_line, math.inf)
+                remaining *= 1 - crossing
+                ball.position = [x, y]
+                ball.rect.topleft = (round(x), math.floor(y) + 1)
+                on_measurement_line()
+                continue
+
+        if not contacts:
+            x += dx
+            y += dy
+            break
+
+        time = min(contact[0] for contact in contacts)
+        first_contacts = [
+            contact for contact in contacts if contact[0] <= time + TIME_EPSILON
+        ]
+        x += dx * time
+        y += dy * time
+        remaining *= 1 - time
+        ball.reflect(
+            any(contact[1] for contact in first_contacts),
+            any(contact[2] for contact in first_contacts),
+        )
+        hit_bricks.extend(contact[3] for contact in first_contacts if contact[3])
+
+    ball.position = [x, y]
+    ball.rect.topleft = (round(x), round(y))
+    return hit_bricks
@@ -0,0 +1,219 @@
+import itertools
+import os
+
+import numpy as np
+
+from . import gates
+from .circuit_grid import ROTATION_STEP
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+# Gates of one wire's operation that take no parameter, and the rotations,
+# each turned by 1 to ROTATION_STEPS - 1 steps of ROTATION_STEP
+SINGLE_GATES = ("x", "y", "z", "h")
+ROTATION_GATES = ("rx", "ry", "rz")
+ROTATION_STEPS = 16
+CONTROLLED_GATES = ("cx", "cy", "cz", "ch")
+NUM_CONTROLLED = len(CONTROLLED_GATES) + ROTATION_STEPS - 1
+
+# Wire codes below each base: nothing, then single gates, then rotations
+SINGLE_BASE = 1
+ROTATION_BASE = SINGLE_BASE + len(SINGLE_GATES)
+CONTROLLED_BASE = ROTATION_BASE + len(ROTATION_GATES) * (ROTATION_STEPS - 1)
+
+
+def get_table_paths(num_qubits, directory=TABLE_DIR):
+    """Paths of the column codes and unitaries files for num_qubits"""
+    return (
+        os.path.join(directory, "column_codes_" + str(num_qubits) + ".npy"),
+        os.path.join(directory, "column_unitaries_" + str(num_qubits) + ".npy"),
+    )
+
+
+def get_bases(num_qubits):
+    """First code of the swap, ccx and cswap wire codes, and the code radix"""
+    swap_base = CONTROLLED_BASE + NUM_CONTROLLED * num_qubits
+    ccx_base = swap_base + num_qubits
+    cswap_base = ccx_base + num_qubits**2
+    return swap_base, ccx_base, cswap_base, cswap_base + num_qubits**2
+
+
+def get_rotation_step(radians):
+    """Number of ROTATION_STEPs in radians, or None if it isn't a whole nonzero number"""
+    steps = radians / ROTATION_STEP
+    step = round(steps)
+    if abs(steps - step) > 1e-9 or not 0 < step < ROTATION_STEPS:
+        return None
+    return step
+
+
+def encode_operation(num_qubits, gate, radians, wires):
+    """Wire holding the node of a compute_operations operation, and its code
+
+    The node is on the last wire for single and controlled gates, and on the
+    first swapped wire for swaps. Returns None for operations the table
+    doesn't cover.
+    """
+    swap_base, ccx_base, cswap_base, _ = get_bases(num_qubits)
+    if gate == "i":
+        return wires[0], 0
+    if gate in SINGLE_GATES:
+        return wires[0], SINGLE_BASE + SINGLE_GATES.index(gate)
+    if gate in ROTATION_GATES:
+        step = get_rotation_step(radians)
+        if step is None:
+            return None
+        return wires[0], (
+            ROTATION_BASE + ROTATION_GATES.index(gate) * (ROTATION_STEPS - 1) + step - 1
+        )
+    if gate in CONTROLLED_GATES or gate == "crz":
+        if gate == "crz":
+            step = get_rotation_step(radians)
+            if step is None:
+                return None
+            controlled = len(CONTROLLED_GATES) + step - 1
+        else:
+            controlled = CONTROLLED_GATES.index(gate)
+        return wires[1], CONTROLLED_BASE + controlled * num_qubits + wires[0]
+    if gate == "swap":
+        return wires[0], swap_base + wires[1]
+    if gate == "ccx":
+        return wires[2], ccx_base + wires[0] * num_qubits + wires[1]
+    if gate == "cswap":
+        return wires[1], cswap_base + wires[0] * num_qubits + wires[2]
+    return None
+
+
+def decode_wire(num_qubits, wire_num, code):
+    """The operation with the given code on wire_num, or None for code 0"""
+    swap_base, ccx_base, cswap_base, _ = get_bases(num_qubits)
+    if code == 0:
+        return None
+    if code < ROTATION_BASE:
+        return SINGLE_GATES[code - SINGLE_BASE], None, (wire_num,)
+    if code < CONTROLLED_BASE:
+        gate, step = divmod(code - ROTATION_BASE, ROTATION_STEPS - 1)
+        return ROTATION_GATES[gate], (step + 1) * ROTATION_STEP, (wire_num,)
+    if code < swap_base:
+        controlled, control = divmod(code - CONTROLLED_BASE, num_qubits)
+        if controlled < len(CONTROLLED_GATES):
+            return CONTROLLED_GATES[controlled], None, (control, wire_num)
+        step = controlled - len(CONTROLLED_GATES) + 1
+        return "crz", step * ROTATION_STEP, (control, wire_num)
+    if code < ccx_base:
+        return "swap", None, (wire_num, code - swap_base)
+    if code < cswap_base:
+        control_a, control_b = divmod(code - ccx_base, num_qubits)
+        return "ccx", None, (control_a, control_b, wire_num)
+    control, partner = divmod(code - cswap_base, num_qubits)
+    return "cswap", None, (control, wire_num, partner)
+
+
+def encode_column(num_qubits, operations):
+    """Code of a column's operations, or None if the table doesn't cover them"""
+    radix = get_bases(num_qubits)[3]
+    codes = [0] * num_qubits
+    used_wires = set()
+    for gate, radians, wires in operations:
+        if (
+            min(wires) < 0
+            or max(wires) >= num_qubits
+            or len(set(wires)) < len(wires)
+            or used_wires.intersection(wires)
+        ):
+            return None
+        encoded = encode_operation(num_qubits, gate, radians, wires)
+        if encoded is None:
+            return None
+        used_wires.update(wires)
+        wire_num, code = encoded
+        codes[wire_num] = code
+    return sum(code * radix**wire_num for wire_num, code in enumerate(codes))
+
+
+def enumerate_columns(num_qubits):
+    """Yield the code and operations of every column the table covers, by code"""
+    radix = get_bases(num_qubits)[3]
+    wire_operations = [
+        [decode_wire(num_qubits, wire_num, code) for code in range(radix)]
+        for wire_num in range(num_qubits)
+    ]
+    # Highest wire first, so codes come out in increasing order
+    for codes in itertools.product(range(radix), repeat=num_qubits):
+        operations = []
+        used_wires = set()
+        for wire_num, code in enumerate(reversed(codes)):
+            operation = wire_operations[wire_num][code]
+            if operation:
+                wires = operation[2]
+                if len(set(wires)) < len(wires) or used_wires.intersection(wires):
+                    break
+                used_wires.update(wires)
+                operations.append(operation)
+        else:
+            code = sum(
+                code * radix**wire_num for wire_num, code in enumerate(reversed(codes))
+            )
+            yield code, operations
+
+
+def build(num_qubits, directory=TABLE_DIR):
+    """Write the codes and unitaries of every covered column, returning their number"""
+    columns = list(enumerate_columns(num_qubits))
+    codes = np.array([code for code, _ in columns], dtype=np.int64)
+    unitaries = np.lib.format.open_memmap(
+        get_table_paths(num_qubits, directory)[1] + ".tmp",
+        mode="w+",
+        dtype=complex,
+        shape=(len(columns), 2**num_qubits, 2**num_qubits),
+    )
+    for index, (_, operations) in enumerate(columns):
+        unitary = unitaries[index]
+        unitary[:] = np.eye(2**num_qubits)
+        for gate, radians, wires in operations:
+            gates.apply_operation(unitary, num_qubits, gate, radians, wires)
+    unitaries.flush()
+    del unitaries
+    codes_path, unitaries_path = get_table_paths(num_qubits, directory)
+    np.save(codes_path, codes)
+    os.replace(unitaries_path + ".tmp", unitaries_path)
+    return len(columns)
+
+
+class ColumnTable:
+    """Unitaries of every column configuration, memory-mapped from the files build() writes
+
+    Columns are looked up by encode_column. Configurations the table doesn't
+    cover, such as S and T gates or rotations off the ROTATION_STEP grid,
+    get None and are left to the compiler.
+    """
+
+    def __init__(self, num_qubits, directory=TABLE_DIR):
+        codes_path, unitaries_path = get_table_paths(num_qubits, directory)
+        self.num_qubits = num_qubits
+        # Plain array views of the mapped files skip np.memmap's wrapping
+        self.codes = np.load(codes_path, mmap_mode="r").view(np.ndarray)
+        self.unitaries = np.load(unitaries_path, mmap_mode="r").view(np.ndarray)
+
+    def get(self, operations):
+        """Unitary of a column's operations, or None if the table doesn't have it"""
+        code = encode_column(self.num_qubits, operations)
+        if code is None:
+            return None
+        index = self.codes.searchsorted(code)
+        if index == len(self.codes) or self.codes[index] != code:
+            return None
+        return self.unitaries[index].copy()
+
+
+column_tables = {}
+
+
+def get_column_table(num_qubits):
+    """Table for num_qubits loaded once, or None if it hasn't been built"""
+    if num_qubits not in column_tables:
+        if all(os.path.exists(path) for path in get_table_paths(num_qubits)):
+            column_tables[num_qubits] = ColumnTable(num_qubits)
+        else:
+            column_tables[num_qubits] = None
+    return column_tables[num_qubits]
@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+
+from . import column_table, gates, globals, optimizer
+from .profiler import CIRCUIT, profiler
+
+
+def column_operations(circuit_grid_model, column_num):
+    """Operations of one column, without its identity gates with globals.OPTIMIZE_CIRCUIT"""
+    start = profiler.start()
+    operations = circuit_grid_model.compute_column_operations(column_num)
+    if globals.OPTIMIZE_CIRCUIT:
+        # Each wire holds one gate of a column, so only identities can go
+        operations, _ = optimizer.optimize(operations)
+    profiler.stop(CIRCUIT, start)
+    return operations
+
+
+def column_unitary(num_qubits, operations):
+    """Fuse the operations of one grid column into a single unitary"""
+    unitary = np.eye(2**num_qubits, dtype=complex)
+    for gate, radians, wires in operations:
+        gates.apply_operation(unitary, num_qubits, gate, radians, wires)
+    return unitary
+
+
+class CircuitCompiler:
+    """Fuses a circuit grid into one unitary, column by column
+
+    Each column's unitary is kept until a node in that column changes, and
+    the products of the first columns are kept too, so an edit only costs a
+    column rebuild and the matrix products from that column onwards.
+
+    Column unitaries come from the precomputed column table when it has been
+    built and covers the column, and are fused from the gates otherwise.
+    Columns left without gates, which are most of a typical grid, are
+    skipped: their prefix product is the one of the column before.
+
+    Above fusion_max_qubits the 2**n x 2**n products cost more than applying
+    the gates, so the statevector after each column is kept instead and an
+    edit replays the gates from the edited column onwards.
+    """
+
+    def __init__(self, fusion_max_qubits=globals.FUSION_MAX_QUBITS):
+        self.fusion_max_qubits = fusion_max_qubits
+        self.num_qubits = None
+        self.fused = True
+        self.column_table = None
+        self.column_keys = []
+        self.column_unitaries = []
+        # prefix_products[i] is the unitary of columns 0 to i when fused,
+        # otherwise the statevector after column i
+        self.prefix_products = []
+        self.lock = threading.Lock()
+
+    def reset(self, num_qubits, max_columns):
+        self.num_qubits = num_qubits
+        self.fused = num_qubits <= self.fusion_max_qubits
+        self.column_table = None
+        if self.fused and globals.COLUMN_TABLE:
+            self.column_table = column_table.get_column_table(num_qubits)
+        self.column_keys = [None] * max_columns
+        self.column_unitaries = [None] * max_columns
+        self.prefix_products = [None] * max_columns
+
+    def update(self, circuit_grid_model):
+        """Recompute the columns edited since the last call and the products after them"""
+        num_qubits = circuit_grid_model.max_wires
+        max_columns = circuit_grid_model.max_columns
+        if num_qubits != self.num_qubits or max_columns != len(self.column_keys):
+            self.reset(num_qubits, max_columns)
+
+        first_changed_column = max_columns
+        for column_num in range(max_columns):
+            column_key = circuit_grid_model.get_column_key(column_num)
+            if column_key != self.column_keys[column_num]:
+                if self.fused:
+                    operations = column_operations(circuit_grid_model, column_num)
+                    # None marks a column without gates
+                    unitary = None
+                    if self.column_table and operations:
+                        unitary = self.column_table.get(operations)
+                    if unitary is None and operations:
+                        unitary = column_unitary(num_qubits, operations)
+                    self.column_unitaries[column_num] = unitary
+                self.column_keys[column_num] = column_key
+                first_changed_column = min(first_changed_column, column_num)
+
+        # Columns without gates share the product of the column before them,
+        # so products are never changed in place
+        for column_num in range(first_changed_column, max_columns):
+            if self.fused:
+                unitary = self.column_unitaries[column_num]
+                if column_num == 0:
+                    if unitary is None:
+                        unitary = np.eye(2**num_qubits, dtype=complex)
+                    self.prefix_products[0] = unitary
+                elif unitary is None:
+                    self.prefix_products[column_num] = self.prefix_products[
+                        column_num - 1
+                    ]
+                else:
+                    self.prefix_products[column_num] = (
+                        unitary @ self.prefix_products[column_num - 1]
+                    )
+            else:
+                if column_num == 0:
+                    statevector = np.zeros(2**num_qubits, dtype=complex)
+                    statevector[0] = 1
+                else:
+                    statevector = self.prefix_products[column_num - 1]
+                operations = column_operations(circuit_grid_model, column_num)
+                if operations:
+                    statevector = statevector.copy()
+                    for gate, radians, wires in operations:
+                        gates.apply_operation(
+                            statevector, num_qubits, gate, radians, wires
+                        )
+                self.prefix_products[column_num] = statevector
+
+    def compile(self, circuit_grid_model):
+        """Return the unitary of the whole grid"""
+        with self.lock:
+            self.update(circuit_grid_model)
+            if not self.fused:
+                raise ValueError(
+                    "Circuits with more than "
+                    + str(self.fusion_max_qubits)
+                    + " qubits are not fused into a unitary"
+                )
+            return self.prefix_products[-1]
+
+    def get_statevector(self, circuit_grid_model):
+        """Return the final state of the grid, starting from |0...0>"""
+        with self.lock:
+            self.update(circuit_grid_model)
+            if self.fused:
+                unitary = self.prefix_products[-1]
+                initial_state = np.zeros(len(unitary), dtype=complex)
+                initial_state[0] = 1
+                return unitary @ initial_state
+            return self.prefix_products[-1].copy()
+
+    def get_prefix_products(self, circuit_grid_model):
+        """Unitaries of the grid truncated after each column"""
+        self.compile(circuit_grid_model)
+        return list(self.prefix_products)
+
+    def get_intermediate_statevector(self, circuit_grid_model, column_num):
+        """State after the gates up to and including column_num, starting from |0...0>"""
+        with self.lock:
+            self.update(circuit_grid_model)
+            if self.fused:
+                return self.prefix_products[column_num][:, 0].copy()
+            return self.prefix_products[column_num].copy()
@@ -1,7 +1,11 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pygame
-import qiskit
 
-from . import globals
+from . import globals, simulator
+from .profiler import SIMULATE, profiler
 
 class Computer:
     def __init__(self):
@@ -24,52 +28,189 @@ class ClassicalComputer(Computer):
         if pygame.sprite.collide_mask(ball, self.paddle):
             ball.bounce()
 
+class StatevectorCache:
+    """LRU cache of statevectors and probabilities keyed by circuit content"""
+
+    def __init__(self, simulator, max_size=globals.STATEVECTOR_CACHE_SIZE):
+        self.simulator = simulator
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # The cache is shared with the simulation worker thread
+        self.lock = threading.Lock()
+
+    def get(self, circuit_grid_model):
+        """Return (statevector, probabilities, cumulative probabilities) of the model
+
+        The circuit is only simulated on a cache miss.
+        """
+        key = circuit_grid_model.get_key()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        start = profiler.start()
+        statevector = self.simulator.get_statevector(circuit_grid_model)
+        profiler.stop(SIMULATE, start)
+        probabilities = np.abs(statevector) ** 2
+        # Kept for sampling measurements without allocating
+        cumulative_probabilities = np.cumsum(probabilities)
+        entry = (statevector, probabilities, cumulative_probabilities)
+        with self.lock:
+            self.entries[key] = entry
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
+
+class SimulationWorker:
+    """Background thread simulating the newest submitted circuit snapshot
+
+    Submitting a new snapshot replaces any request that has not started yet,
+    so only the newest circuit revision gets simulated.
+    """
+
+    def __init__(self, statevector_cache):
+        self.statevector_cache = statevector_cache
+        self.condition = threading.Condition()
+        self.pending = None
+        self.running = True
+        # (revision, probabilities) of the most recent completed simulation
+        self.latest = None
+        self.thread = threading.Thread(target=self.run, name="SimulationWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, circuit_grid_model):
+        snapshot = circuit_grid_model.snapshot()
+        with self.condition:
+            self.pending = snapshot
+            self.condition.notify()
+
+    def get_latest(self):
+        return self.latest
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                snapshot = self.pending
+                self.pending = None
+            statevector, probabilities, _ = self.statevector_cache.get(snapshot)
+            self.latest = (snapshot.revision, probabilities)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
 class QuantumComputer(Computer):
-    def __init__(self, quantum_paddles, circuit_grid) -> None:
+    def __init__(self, quantum_paddles, circuit_grid, seed=None, get_ticks=pygame.time.get_ticks) -> None:
+        self.quantum_paddles = quantum_paddles
         self.paddles = quantum_paddles.paddles 
         self.score = 0
         self.circuit_grid = circuit_grid
         self.measured_state = 0 
-        self.last_measurement_time = pygame.time.get_ticks() - globals.MEASUREMENT_COOLDOWN_TIME
+        self.simulator = simulator.get_simulator(globals.SIMULATOR_ENGINE)
+        self.statevector_cache = StatevectorCache(self.simulator)
+        # Measurements are drawn from the cached probabilities with this generator
+        self.rng = np.random.default_rng(globals.MEASUREMENT_SEED if seed is None else seed)
+        self.measurement_draws = np.empty(0)
+        self.next_measurement_draw = 0
+        # Circuit revision currently shown by the paddles, None after a measurement
+        self.displayed_revision = None
+        self.submitted_revision = None
+        self.simulation_worker = None
+        if globals.ASYNC_SIMULATION:
+            self.simulation_worker = SimulationWorker(self.statevector_cache)
+        # Clock in milliseconds, replaced by a virtual one in headless runs
+        self.get_ticks = get_ticks
+        self.last_measurement_time = self.get_ticks() - globals.MEASUREMENT_COOLDOWN_TIME
+        # How often each basis state has been measured
+        self.measurement_counts = np.zeros(len(self.paddles), dtype=np.int64)
 
     def update(self, ball):
-        current_time = pygame.time.get_ticks()
+        self.update_measurement(ball)
+        if pygame.sprite.collide_mask(ball, self.get_active_paddle()):
+            ball.bounce() 
+
+    def get_active_paddle(self):
+        # The paddle of the last measured state bounces the ball, whether it is shown or not
+        return self.paddles[self.measured_state]
+
+    def update_measurement(self, ball):
+        current_time = self.get_ticks()
         # trigger measurement when the ball is close to quantum paddles
         if ball.rect.y > globals.WINDOW_HEIGHT * 0.55:
             # We add measurement cooldown: So that after measurement, it remains in the same state for sometime before re-changing to superposition state according to circuit
             if current_time - self.last_measurement_time > globals.MEASUREMENT_COOLDOWN_TIME:
                 self.update_after_measurement()
-                self.last_measurement_time = pygame.time.get_ticks()
+                self.last_measurement_time = self.get_ticks()
         else:
             self.update_before_measurement()
-    
-        if pygame.sprite.collide_mask(ball, self.paddles[self.measured_state]):
-            ball.bounce() 
 
     # To get probabilities of each state before measurement
     def update_before_measurement(self):
-        simulator = qiskit.BasicAer.get_backend("statevector_simulator")
-        circuit = self.circuit_grid.model.compute_circuit()
-        transpiled_circuit = qiskit.transpile(circuit, simulator)
-        statevector = simulator.run(transpiled_circuit, shots=100).result().get_statevector()
+        model = self.circuit_grid.model
+        # Paddles already show this circuit: nothing to do
+        if self.displayed_revision == model.revision:
+            return
+
+        if self.simulation_worker:
+            # Hand the circuit to the worker and show its newest finished result
+            if self.submitted_revision != model.revision:
+                self.simulation_worker.submit(model)
+                self.submitted_revision = model.revision
+            latest = self.simulation_worker.get_latest()
+            if latest is None or latest[0] == self.displayed_revision:
+                return
+            revision, probabilities = latest
+        else:
+            revision = model.revision
+            statevector, probabilities, _ = self.statevector_cache.get(model)
+
+        # Set the opacity of each paddle equal to the probability of measuring that state,
+        # drawing only the most probable ones when there are many qubits
+        visible_states = np.flatnonzero(probabilities * 255 >= 1)
+        if len(visible_states) > globals.MAX_VISIBLE_PADDLES:
+            top_states = np.argpartition(probabilities[visible_states], -globals.MAX_VISIBLE_PADDLES)
+            visible_states = visible_states[top_states[-globals.MAX_VISIBLE_PADDLES:]]
+        self.quantum_paddles.show(visible_states, probabilities[visible_states] * 255)
+        self.displayed_revision = revision
+
+    def predraw_measurements(self, count=globals.MEASUREMENT_BATCH_SIZE):
+        """Draw the random numbers for the next count measurements in one batch"""
+        self.measurement_draws = self.rng.random(count)
+        self.next_measurement_draw = 0
 
-        # Set the opacity of each paddle equal to the probability of measuring that state
-        for basis_state, amplitude in enumerate(statevector):
-            self.paddles[basis_state].image.set_alpha(abs(amplitude)**2*255)
+    def measure(self):
+        """Collapse the current circuit to a basis state and return its index"""
+        _, _, cumulative_probabilities = self.statevector_cache.get(self.circuit_grid.model)
+        if self.next_measurement_draw >= len(self.measurement_draws):
+            self.predraw_measurements()
+        draw = self.measurement_draws[self.next_measurement_draw]
+        self.next_measurement_draw += 1
+
+        # Scale by the total so rounding errors in the statevector norm don't matter
+        basis_state = int(np.searchsorted(cumulative_probabilities, draw * cumulative_probabilities[-1], side="right"))
+        return min(basis_state, len(cumulative_probabilities) - 1)
+
+    def close(self):
+        if self.simulation_worker:
+            self.simulation_worker.stop()
 
     # To measure the state
     def update_after_measurement(self):
-        simulator = qiskit.BasicAer.get_backend("qasm_simulator")
-        circuit = self.circuit_grid.model.compute_circuit()
-        circuit.measure_all()
-        transpiled_circuit = qiskit.transpile(circuit, simulator)
-        counts = simulator.run(transpiled_circuit, shots=1).result().get_counts()
-        self.measured_state = int(list(counts.keys())[0], 2)
+        self.measured_state = self.measure()
+        self.measurement_counts[self.measured_state] += 1
+        self.displayed_revision = None
         
-        # Set all the paddles to transparant
-        for paddle in self.paddles:
-            paddle.image.set_alpha(0)
-
-        # Then, set only the paddle over the output state to white
-        self.paddles[self.measured_state].image.set_alpha(255)
+        # Set only the paddle over the output state to white, and all the others to transparent
+        self.quantum_paddles.show([self.measured_state], [255])
         
\ No newline at end of file
@@ -0,0 +1,123 @@
+import numpy as np
+import pygame
+
+from . import headless
+
+# Discrete actions and the CircuitGrid keys they press, None pressing nothing
+ACTIONS = (
+    ("noop", None),
+    ("move_left", pygame.K_a),
+    ("move_right", pygame.K_d),
+    ("move_up", pygame.K_w),
+    ("move_down", pygame.K_s),
+    ("place_x", pygame.K_x),
+    ("place_y", pygame.K_y),
+    ("place_z", pygame.K_z),
+    ("place_h", pygame.K_h),
+    ("ctrl", pygame.K_c),
+    ("move_ctrl_up", pygame.K_UP),
+    ("move_ctrl_down", pygame.K_DOWN),
+    ("rotate_left", pygame.K_LEFT),
+    ("rotate_right", pygame.K_RIGHT),
+    ("delete", pygame.K_SPACE),
+)
+
+ACTION_NAMES = tuple(name for name, _ in ACTIONS)
+ACTION_KEYS = tuple(key for _, key in ACTIONS)
+
+
+class QuantumBreakoutEnv:
+    """Gym-style reset()/step(action) interface to a headless GameScene
+
+    Actions index ACTIONS and press the matching circuit key on the first
+    frame of the step. Observations are a dict of NumPy arrays:
+
+        ball           int64 [x, y, velocity x, velocity y]
+        circuit        int8 (wires, columns, 5), see CircuitGridModel.get_node_array
+        cursor         int64 [selected wire, selected column]
+        probabilities  float64 (2**wires,) measurement probabilities of the circuit
+        measured_state int64 [basis state of the paddle that bounces the ball]
+
+    The reward is score_reward per brick hit minus drop_penalty per dropped
+    ball. step() returns (observation, reward, terminated, truncated, info)
+    where terminated means the game was won or lost and truncated means
+    max_frames ran out first. The circuit and probabilities arrays are
+    shared with the game's caches and must not be modified.
+    """
+
+    def __init__(
+        self, frame_skip=1, max_frames=100000, score_reward=1.0, drop_penalty=1.0
+    ):
+        if not pygame.display.get_init():
+            headless.init_headless()
+        self.frame_skip = frame_skip
+        self.max_frames = max_frames
+        self.score_reward = score_reward
+        self.drop_penalty = drop_penalty
+        self.num_actions = len(ACTIONS)
+        self.game = headless.HeadlessGame(policy=self.get_keys)
+        self.pending_keys = ()
+
+    def get_keys(self, game_scene):
+        keys = self.pending_keys
+        self.pending_keys = ()
+        return keys
+
+    def reset(self, seed=None):
+        self.game.scene.quantum_computer.close()
+        self.game.reset(seed)
+        return self.get_observation(), self.get_info()
+
+    def step(self, action):
+        key = ACTION_KEYS[action]
+        self.pending_keys = () if key is None else (key,)
+
+        game_state = self.game.scene.game_state
+        score = game_state.player_score
+        drops = game_state.ball_dropped
+        game_over = None
+        for _ in range(self.frame_skip):
+            game_over = self.game.step()
+            if game_over or self.game.frames >= self.max_frames:
+                break
+        reward = self.score_reward * (
+            game_state.player_score - score
+        ) - self.drop_penalty * (game_state.ball_dropped - drops)
+        terminated = game_over is not None
+        truncated = not terminated and self.game.frames >= self.max_frames
+        return self.get_observation(), reward, terminated, truncated, self.get_info()
+
+    def get_observation(self):
+        game_scene = self.game.scene
+        game_ball = game_scene.game_ball
+        circuit_grid = game_scene.circuit_grid
+        quantum_computer = game_scene.quantum_computer
+        _, probabilities, _ = quantum_computer.statevector_cache.get(circuit_grid.model)
+        return {
+            "ball": np.array(
+                [
+                    game_ball.rect.x,
+                    game_ball.rect.y,
+                    game_ball.velocity[0],
+                    game_ball.velocity[1],
+                ]
+            ),
+            "circuit": circuit_grid.model.get_node_array(),
+            "cursor": np.array(
+                [circuit_grid.selected_wire, circuit_grid.selected_column]
+            ),
+            "probabilities": probabilities,
+            "measured_state": np.array([quantum_computer.measured_state]),
+        }
+
+    def get_info(self):
+        game_state = self.game.scene.game_state
+        return {
+            "score": game_state.player_score,
+            "drops": game_state.ball_dropped,
+            "frames": self.game.frames,
+            "outcome": self.game.scene.game_over,
+        }
+
+    def close(self):
+        self.game.scene.quantum_computer.close()
@@ -0,0 +1,13 @@
+class GameState:
+    """Score and progress of one game, so several games can run side by side"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # PLAYER SCORE
+        self.player_score = 0
+        self.ball_dropped = 0
+
+        # GAME PAUSE
+        self.game_paused = False
@@ -0,0 +1,91 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Number of leading control wires for each multi-qubit gate in compute_operations
+CONTROL_COUNTS = {
+    "cx": 1,
+    "ccx": 2,
+    "cy": 1,
+    "cz": 1,
+    "crz": 1,
+    "ch": 1,
+    "cswap": 1,
+}
+
+SQRT_HALF = 1 / np.sqrt(2)
+
+GATE_MATRICES = {
+    "i": np.array([[1, 0], [0, 1]], dtype=complex),
+    "x": np.array([[0, 1], [1, 0]], dtype=complex),
+    "y": np.array([[0, -1j], [1j, 0]], dtype=complex),
+    "z": np.array([[1, 0], [0, -1]], dtype=complex),
+    "h": np.array([[SQRT_HALF, SQRT_HALF], [SQRT_HALF, -SQRT_HALF]], dtype=complex),
+    "s": np.array([[1, 0], [0, 1j]], dtype=complex),
+    "sdg": np.array([[1, 0], [0, -1j]], dtype=complex),
+    "t": np.array([[1, 0], [0, np.exp(1j * np.pi / 4)]], dtype=complex),
+    "tdg": np.array([[1, 0], [0, np.exp(-1j * np.pi / 4)]], dtype=complex),
+}
+
+
+def gate_matrix(gate, radians=None):
+    """Return the 2x2 matrix of a single qubit gate"""
+    if gate == "rx":
+        cos, sin = np.cos(radians / 2), np.sin(radians / 2)
+        return np.array([[cos, -1j * sin], [-1j * sin, cos]], dtype=complex)
+    elif gate == "ry":
+        cos, sin = np.cos(radians / 2), np.sin(radians / 2)
+        return np.array([[cos, -sin], [sin, cos]], dtype=complex)
+    elif gate == "rz":
+        return np.array(
+            [[np.exp(-0.5j * radians), 0], [0, np.exp(0.5j * radians)]], dtype=complex
+        )
+    return GATE_MATRICES[gate]
+
+
+@lru_cache(maxsize=None)
+def pair_indices(num_qubits, wire_a, wire_b, controls):
+    """Indices of the amplitude pairs that differ only on wire_a and wire_b
+
+    The first array has wire_a set and wire_b clear, the second one the
+    opposite. Passing the same wire twice gives the pairs a single qubit gate
+    acts on. Only basis states with every control wire set are included.
+    Qubit 0 is the least significant bit, as in Qiskit.
+    """
+    basis_states = np.arange(2**num_qubits)
+    selected = np.ones(2**num_qubits, dtype=bool)
+    for control in controls:
+        selected &= (basis_states >> control) & 1 == 1
+    if wire_a == wire_b:
+        selected &= (basis_states >> wire_a) & 1 == 0
+        lower = basis_states[selected]
+        return lower, lower | (1 << wire_a)
+    selected &= (basis_states >> wire_a) & 1 == 1
+    selected &= (basis_states >> wire_b) & 1 == 0
+    lower = basis_states[selected]
+    return lower, lower ^ (1 << wire_a) ^ (1 << wire_b)
+
+
+def apply_operation(state, num_qubits, gate, radians, wires):
+    """Apply one (gate, radians, wires) operation in place
+
+    state can be a statevector or a matrix whose rows are indexed by basis
+    state, so the same code is used to build unitaries.
+    """
+    num_controls = CONTROL_COUNTS.get(gate, 0)
+    controls = tuple(wires[:num_controls])
+    targets = wires[num_controls:]
+    gate = gate[num_controls:]
+
+    if gate == "swap":
+        first, second = pair_indices(num_qubits, targets[0], targets[1], controls)
+        state[first], state[second] = state[second], state[first].copy()
+        return state
+
+    first, second = pair_indices(num_qubits, targets[0], targets[0], controls)
+    matrix = gate_matrix(gate, radians)
+    amplitudes_0 = state[first]
+    amplitudes_1 = state[second]
+    state[first] = matrix[0, 0] * amplitudes_0 + matrix[0, 1] * amplitudes_1
+    state[second] = matrix[1, 0] * amplitudes_0 + matrix[1, 1] * amplitudes_1
+    return state
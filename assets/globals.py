@@ -1,14 +1,45 @@
+import os
+
 # colors
 WHITE = 255, 255, 255
 BLACK = 0, 0, 0
 MAGENTA = 255, 0, 255
 GRAY = 194, 192, 192
 
-# number of the qubits for the quantum circuit
-NUM_QUBITS = 3
+# number of the qubits for the quantum circuit (harder levels use 5 to 8)
+NUM_QUBITS = int(os.environ.get("QBREAKOUT_NUM_QUBITS", 3))
+
+# simulator engine for the quantum circuit: "numpy" (built-in) or "qiskit" (BasicAer reference)
+SIMULATOR_ENGINE = "numpy"
+
+# number of distinct circuits whose statevectors are kept in memory
+STATEVECTOR_CACHE_SIZE = 64
+
+# simulate circuit edits on a background thread instead of inside the game loop
+ASYNC_SIMULATION = False
+
+# drop identity gates before simulating the circuit, so columns holding only them are skipped
+OPTIMIZE_CIRCUIT = True
+
+# look column unitaries up in the table written by build_column_table.py, when it exists
+COLUMN_TABLE = True
+
+# circuits with more qubits are simulated column by column instead of as one fused unitary
+FUSION_MAX_QUBITS = 5
+
+# sweep the ball along its path each frame so fast balls can't pass through bricks and paddles
+CONTINUOUS_COLLISION = False
+
+# redraw only the changed parts of the screen instead of the full frame
+DIRTY_RECT_RENDERING = False
+
+# number of frames whose section timings the profiler keeps
+PROFILER_BUFFER_SIZE = 600
 
 # Statevector
-BASIS_STATES = ["|000>", "|001>", "|010>", "|011>", "|100>", "|101>", "|110>", "|111>"]
+BASIS_STATES = [
+    "|" + format(i, "0" + str(NUM_QUBITS) + "b") + ">" for i in range(2**NUM_QUBITS)
+]
 
 # Game dimensions
 WINDOW_WIDTH = 1200
@@ -18,15 +49,19 @@ WIDTH_UNIT = round(WINDOW_WIDTH / 100)  # width unit used for scaling the game
 
 ## PADDLES
 # PADDLE_WIDTH = round(FIELD_HEIGHT / 2**NUM_QUBITS) # NOT ACCURATE: Just keep here for future reference
-PADDLE_WIDTH = int(round(WINDOW_WIDTH / len(BASIS_STATES)))
+PADDLE_WIDTH = max(1, WINDOW_WIDTH // len(BASIS_STATES))
 PADDLE_HEIGHT = WIDTH_UNIT
+# only the most probable paddles are drawn, fainter ones than 1/255 are skipped
+MAX_VISIBLE_PADDLES = 32
 
 ## STATEVECTORS
-STATEVECTOR_WIDTH = int(round(WINDOW_WIDTH / len(BASIS_STATES)))
+STATEVECTOR_WIDTH = max(1, WINDOW_WIDTH // len(BASIS_STATES))
 STATEVECTOR_HEIGHT = int(WINDOW_HEIGHT * 0.62)
 
 ## GAME BALL
 BALL_SIZE = WIDTH_UNIT
+# pixels the ball moves per frame horizontally (twice as many vertically)
+BALL_SPEED = 1
 
 ## BRICKS
 BRICK_WIDTH = int(round(WINDOW_WIDTH / 20))
@@ -34,19 +69,21 @@ BRICK_HEIGHT = WIDTH_UNIT * 2
 BRICK_X_GAP = 75
 BRICKS_Y_GAP = 12
 NUMLAYERS = 5
+# cell size of the spatial index used for ball-brick collisions
+BRICK_CELL_WIDTH = BRICK_WIDTH
+BRICK_CELL_HEIGHT = BRICK_HEIGHT * 2
 
 # cool down time (in milliseconds) before the next measurement is allowed
 MEASUREMENT_COOLDOWN_TIME = 4000
 
+# seed for the measurement random number generator (None for a random seed)
+MEASUREMENT_SEED = None
+
+# number of measurement random draws generated at once
+MEASUREMENT_BATCH_SIZE = 64
+
 # score to win a game
 WIN_SCORE = 5
 
 # Number of ball drops for player to lose game
 LOSE_SCORE = 8
-
-# PLAYER SCORE
-player_score = 0
-ball_dropped = 0
-
-# GAME PAUSE
-game_paused = False
@@ -0,0 +1,119 @@
+import os
+
+import pygame
+
+from . import scene
+
+# Length of one frame of the 60 FPS game loop, in milliseconds
+FRAME_TIME = 1000 / 60
+
+
+def init_headless():
+    """Initialise pygame on SDL's dummy drivers, without a window or audio device"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.display.init()
+    pygame.font.init()
+    # Surfaces can only be converted once a display mode is set
+    pygame.display.set_mode((1, 1))
+
+
+class VirtualClock:
+    """Game clock advanced by a fixed timestep instead of the wall clock"""
+
+    def __init__(self, frame_time=FRAME_TIME):
+        self.frame_time = frame_time
+        self.frame = 0
+
+    def get_ticks(self):
+        return int(self.frame * self.frame_time)
+
+    def tick(self, frames=1):
+        self.frame += frames
+
+
+def idle_policy(game_scene):
+    """Input source that never presses a key"""
+    return ()
+
+
+class RandomPolicy:
+    """Input source pressing a random gate, cursor or rotation key on some frames"""
+
+    KEYS = (
+        pygame.K_x,
+        pygame.K_y,
+        pygame.K_z,
+        pygame.K_h,
+        pygame.K_SPACE,
+        pygame.K_w,
+        pygame.K_a,
+        pygame.K_s,
+        pygame.K_d,
+        pygame.K_LEFT,
+        pygame.K_RIGHT,
+    )
+
+    def __init__(self, rng, key_probability=0.05):
+        self.rng = rng
+        self.key_probability = key_probability
+
+    def __call__(self, game_scene):
+        if self.rng.random() < self.key_probability:
+            return (self.rng.choice(self.KEYS),)
+        return ()
+
+
+class ScriptedInput:
+    """Input source replaying keys from a {frame: [keys]} script"""
+
+    def __init__(self, script):
+        self.script = script
+        self.frame = 0
+
+    def __call__(self, game_scene):
+        keys = self.script.get(self.frame, ())
+        self.frame += 1
+        return keys
+
+
+class HeadlessGame:
+    """Runs a GameScene at a fixed timestep as fast as the CPU allows
+
+    The policy is called once per frame with the scene and returns the keys
+    pressed during that frame, in place of pygame.event.get(). Nothing is
+    drawn, so frames cost only the game logic and the quantum backend.
+
+    With frames_per_step above 1 each step covers that many frames at once,
+    which needs globals.CONTINUOUS_COLLISION.
+    """
+
+    def __init__(self, policy=idle_policy, frames_per_step=1):
+        self.policy = policy
+        self.frames_per_step = frames_per_step
+        self.clock = VirtualClock()
+        self.reset()
+
+    def reset(self, seed=None):
+        self.clock.frame = 0
+        self.scene = scene.GameScene(get_ticks=self.clock.get_ticks, seed=seed)
+        return self.scene
+
+    def step(self):
+        """Advance one step, returning the outcome once the game is over"""
+        self.scene.step(self.policy(self.scene), self.frames_per_step)
+        self.clock.tick(self.frames_per_step)
+        return self.scene.game_over
+
+    def run(self, max_frames):
+        """Play until the game ends or max_frames have passed, returning the outcome"""
+        while self.frames < max_frames:
+            game_over = self.step()
+            if game_over:
+                break
+        self.scene.quantum_computer.close()
+        return self.scene.game_over
+
+    @property
+    def frames(self):
+        return self.clock.frame
@@ -0,0 +1,112 @@
+import math
+
+# Single qubit gates undone by the next gate on their wire
+INVERSES = {
+    "x": "x",
+    "y": "y",
+    "z": "z",
+    "h": "h",
+    "s": "sdg",
+    "sdg": "s",
+    "t": "tdg",
+    "tdg": "t",
+}
+
+# Multi-qubit gates that are their own inverse
+SELF_INVERSE = {"cx", "ccx", "cy", "cz", "ch", "swap", "cswap"}
+
+# Rotations merged with the next rotation about the same axis, with the angle
+# after which they are the identity: 2 pi up to global phase for single qubit
+# rotations, 4 pi for controlled ones, where the phase is relative
+ROTATION_PERIODS = {"rx": 2 * math.pi, "ry": 2 * math.pi, "rz": 2 * math.pi}
+CONTROLLED_ROTATION_PERIODS = {"crz": 4 * math.pi}
+
+# Angles closer than this to a multiple of the period are the identity
+ANGLE_TOLERANCE = 1e-9
+
+
+def operation_key(gate, wires):
+    """Gate and wires, with the wires of symmetric gates in a fixed order"""
+    if gate in ("cz", "swap"):
+        return gate, tuple(sorted(wires))
+    if gate == "ccx":
+        return gate, tuple(sorted(wires[:2])) + wires[2:]
+    if gate == "cswap":
+        return gate, wires[:1] + tuple(sorted(wires[1:]))
+    return gate, tuple(wires)
+
+
+def merge_angle(radians, period):
+    """Angle of a merged rotation in (-period / 2, period / 2], or None for the identity"""
+    radians = math.remainder(radians, period)
+    if abs(radians) < ANGLE_TOLERANCE:
+        return None
+    return radians
+
+
+def optimize(operations):
+    """Simplify a list of (gate name, radians, wires) operations
+
+    Identity gates are dropped, a gate followed by its inverse on the same
+    wires is removed, and consecutive rotations about the same axis are
+    merged into one. Gates on other wires commute with a gate, so two gates
+    count as consecutive when nothing between them touches their wires,
+    which lets gates cancel across empty columns. Removals are repeated as
+    the gates on either side of them become consecutive.
+
+    The result is equivalent to operations up to a global phase. Returns the
+    simplified operations and the number of gates removed.
+    """
+    # Surviving operations, None where one was removed later
+    output = []
+    # Indices in output of the surviving operations on each wire, last on top
+    wire_stacks = {}
+
+    for gate, radians, wires in operations:
+        if gate == "i":
+            continue
+
+        stacks = [wire_stacks.setdefault(wire, []) for wire in wires]
+        previous_index = stacks[0][-1] if stacks[0] else None
+        previous = None
+        if previous_index is not None and all(
+            stack and stack[-1] == previous_index for stack in stacks
+        ):
+            previous = output[previous_index]
+            if len(previous[2]) != len(wires):
+                # The previous gate also acts on other wires
+                previous = None
+
+        if previous is not None:
+            previous_gate, previous_radians, previous_wires = previous
+            merged = False
+            if len(wires) == 1 and INVERSES.get(previous_gate) == gate:
+                merged = True
+                radians = None
+            elif gate in SELF_INVERSE and operation_key(
+                previous_gate, previous_wires
+            ) == operation_key(gate, wires):
+                merged = True
+                radians = None
+            elif previous_gate == gate and previous_wires == wires:
+                period = ROTATION_PERIODS.get(gate) or CONTROLLED_ROTATION_PERIODS.get(
+                    gate
+                )
+                if period:
+                    merged = True
+                    radians = merge_angle(previous_radians + radians, period)
+            if merged:
+                if radians is None:
+                    output[previous_index] = None
+                    for stack in stacks:
+                        stack.pop()
+                else:
+                    output[previous_index] = (gate, radians, wires)
+                continue
+
+        for stack in stacks:
+            stack.append(len(output))
+        output.append((gate, radians, wires))
+
+    simplified = [operation for operation in output if operation is not None]
+    return simplified, len(operations) - len(simplified)
@@ -2,18 +2,37 @@ import pygame
 
 from . import globals
 
-class Paddle(pygame.sprite.Sprite):
+class Paddle(pygame.sprite.DirtySprite):
     def __init__(self, x_pos=0, y_pos=0):
         super().__init__()
 
         self.image = pygame.Surface([globals.PADDLE_WIDTH, globals.PADDLE_HEIGHT])
         self.image.fill(globals.WHITE)
         self.rect = self.image.get_rect()
+        # Built once so collide_mask doesn't rebuild it on every test
+        self.mask = pygame.mask.from_surface(self.image)
         self.rect.x = x_pos
         self.rect.y = y_pos
+        self.visible = 0
 
 class QuantumPaddles:
     def __init__(self, x_pos=0, y_pos=globals.WINDOW_HEIGHT * 0.6):
         self.paddles = []
         for i in range(2**globals.NUM_QUBITS):
             self.paddles.append(Paddle(i*x_pos, y_pos))
+        # Only paddles with a visible opacity are drawn
+        self.visible_paddles = pygame.sprite.Group()
+
+    def show(self, basis_states, alphas):
+        """Make only the paddles over basis_states visible, with the given opacities"""
+        for paddle in self.visible_paddles.sprites():
+            paddle.image.set_alpha(0)
+            paddle.visible = 0
+        self.visible_paddles.empty()
+        for basis_state, alpha in zip(basis_states, alphas):
+            paddle = self.paddles[basis_state]
+            paddle.image.set_alpha(alpha)
+            paddle.visible = 1
+            # Alpha changes don't touch visible, so mark the paddle for redrawing
+            paddle.dirty = 1
+            self.visible_paddles.add(paddle)
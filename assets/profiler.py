@@ -0,0 +1,138 @@
+import json
+import time
+
+import numpy as np
+
+from . import globals
+
+# Timed sections, one column each in the ring buffer. circuit and transpile
+# are parts of simulate, which is part of computer, and everything is part
+# of frame.
+SECTIONS = (
+    "events",
+    "input",
+    "computer",
+    "circuit",
+    "transpile",
+    "simulate",
+    "bricks",
+    "draw",
+    "flip",
+    "frame",
+)
+(
+    EVENTS,
+    INPUT,
+    COMPUTER,
+    CIRCUIT,
+    TRANSPILE,
+    SIMULATE,
+    BRICKS,
+    DRAW,
+    FLIP,
+    FRAME,
+) = range(len(SECTIONS))
+
+
+class Profiler:
+    """Per-frame section timings kept in a ring buffer of the last frames
+
+    Timed code calls start() and passes its result to stop(). While the
+    profiler is disabled start() returns None and stop() returns at once,
+    so instrumentation costs two method calls.
+    """
+
+    def __init__(self, size=globals.PROFILER_BUFFER_SIZE):
+        self.enabled = False
+        # Seconds spent in each section, one row per frame
+        self.buffer = np.zeros((size, len(SECTIONS)))
+        self.frames = 0
+        self.current = [0.0] * len(SECTIONS)
+        self.frame_start = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.current = [0.0] * len(SECTIONS)
+        self.frame_start = None
+
+    def toggle(self):
+        self.enable(not self.enabled)
+
+    def start(self):
+        if self.enabled:
+            return time.perf_counter()
+        return None
+
+    def stop(self, section, start):
+        if start is not None:
+            self.current[section] += time.perf_counter() - start
+
+    def begin_frame(self):
+        self.frame_start = self.start()
+
+    def end_frame(self):
+        """Store the current frame's timings in the ring buffer"""
+        if self.frame_start is None:
+            # Enabled partway through the frame: drop its partial timings
+            self.current = [0.0] * len(SECTIONS)
+            return
+        self.stop(FRAME, self.frame_start)
+        self.buffer[self.frames % len(self.buffer)] = self.current
+        self.frames += 1
+        self.current = [0.0] * len(SECTIONS)
+        self.frame_start = None
+
+    def get_samples(self):
+        """Timings of the buffered frames in seconds, oldest first"""
+        size = len(self.buffer)
+        if self.frames <= size:
+            return self.buffer[: self.frames].copy()
+        return np.roll(self.buffer, -(self.frames % size), axis=0)
+
+    def get_percentiles(self, percentiles=(50, 95, 99)):
+        """Milliseconds per section at each percentile, as a (percentiles, sections) array"""
+        samples = self.get_samples()
+        if len(samples) == 0:
+            return np.zeros((len(percentiles), len(SECTIONS)))
+        return np.percentile(samples, percentiles, axis=0) * 1000
+
+    def export_csv(self, path):
+        samples = self.get_samples() * 1000
+        first_frame = self.frames - len(samples)
+        with open(path, "w") as file:
+            file.write("frame," + ",".join(name + "_ms" for name in SECTIONS) + "\n")
+            for frame_num, row in enumerate(samples, first_frame):
+                file.write(
+                    str(frame_num)
+                    + ","
+                    + ",".join("%.4f" % value for value in row)
+                    + "\n"
+                )
+
+    def export_json(self, path):
+        samples = self.get_samples() * 1000
+        percentiles = self.get_percentiles()
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "sections": list(SECTIONS),
+                    "first_frame": self.frames - len(samples),
+                    "percentiles_ms": {
+                        name: dict(zip(("p50", "p95", "p99"), percentiles[:, index]))
+                        for index, name in enumerate(SECTIONS)
+                    },
+                    "frames_ms": samples.round(4).tolist(),
+                },
+                file,
+            )
+
+    def export(self, path):
+        """Write the buffer as JSON if path ends in .json, otherwise as CSV"""
+        if path.endswith(".json"):
+            self.export_json(path)
+        else:
+            self.export_csv(path)
+
+
+# Shared by every instrumented module
+profiler = Profiler()
@@ -0,0 +1,196 @@
+import random
+import struct
+import time
+import zlib
+
+import pygame
+
+from . import globals, scene
+
+# File layout: HEADER, then the zlib-compressed frames. Each frame is
+# FRAME (milliseconds since the previous frame, number of keys with
+# MEASURED_FLAG set when a measurement happened), the keys as KEY, and the
+# measured basis state as MEASUREMENT when flagged.
+MAGIC = b"QBRL"
+VERSION = 1
+HEADER = struct.Struct("<4sBBQIIIb")
+FRAME = struct.Struct("<HB")
+KEY = struct.Struct("<I")
+MEASUREMENT = struct.Struct("<H")
+MEASURED_FLAG = 0x80
+
+OUTCOMES = {scene.WON: 1, scene.LOST: 0, None: -1}
+OUTCOME_NAMES = {value: name for name, value in OUTCOMES.items()}
+
+
+class LatchedClock:
+    """Clock read once per frame, so every call during a frame agrees"""
+
+    def __init__(self, time_source=pygame.time.get_ticks):
+        self.time_source = time_source
+        self.start = time_source()
+        self.ticks = 0
+
+    def get_ticks(self):
+        return self.ticks
+
+    def latch(self):
+        self.ticks = self.time_source() - self.start
+        return self.ticks
+
+
+class Recording:
+    """Seed, per-frame inputs and measurements, and final result of one game"""
+
+    def __init__(self, seed, num_qubits=globals.NUM_QUBITS):
+        self.seed = seed
+        self.num_qubits = num_qubits
+        # (ticks, keys, measured basis state or None) for every frame
+        self.frames = []
+        self.score = 0
+        self.drops = 0
+        self.outcome = None
+
+    def save(self, path):
+        body = bytearray()
+        previous_ticks = 0
+        for ticks, keys, measured_state in self.frames:
+            count = len(keys)
+            if measured_state is not None:
+                count |= MEASURED_FLAG
+            # Longer gaps already exceed any measurement cooldown
+            body += FRAME.pack(min(ticks - previous_ticks, 0xFFFF), count)
+            for key in keys:
+                body += KEY.pack(key)
+            if measured_state is not None:
+                body += MEASUREMENT.pack(measured_state)
+            previous_ticks = ticks
+        with open(path, "wb") as file:
+            file.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    self.num_qubits,
+                    self.seed,
+                    len(self.frames),
+                    self.score,
+                    self.drops,
+                    OUTCOMES[self.outcome],
+                )
+            )
+            file.write(zlib.compress(bytes(body)))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, num_qubits, seed, num_frames, score, drops, outcome = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a version " + str(VERSION) + " recording")
+        recording = cls(seed, num_qubits)
+        recording.score = score
+        recording.drops = drops
+        recording.outcome = OUTCOME_NAMES[outcome]
+
+        body = zlib.decompress(data[HEADER.size :])
+        offset = 0
+        ticks = 0
+        for _ in range(num_frames):
+            elapsed, count = FRAME.unpack_from(body, offset)
+            offset += FRAME.size
+            ticks += elapsed
+            keys = []
+            for _ in range(count & ~MEASURED_FLAG):
+                keys.append(KEY.unpack_from(body, offset)[0])
+                offset += KEY.size
+            measured_state = None
+            if count & MEASURED_FLAG:
+                measured_state = MEASUREMENT.unpack_from(body, offset)[0]
+                offset += MEASUREMENT.size
+            recording.frames.append((ticks, keys, measured_state))
+        return recording
+
+
+class Recorder:
+    """Records a GameScene played with a wall clock latched once per frame"""
+
+    def __init__(self, path, seed=None, time_source=pygame.time.get_ticks):
+        self.path = path
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.recording = Recording(seed)
+        self.clock = LatchedClock(time_source)
+
+    def start_frame(self):
+        self.clock.latch()
+
+    def record_frame(self, game_scene, keys, measured_state):
+        self.recording.frames.append((self.clock.ticks, list(keys), measured_state))
+        self.recording.score = game_scene.game_state.player_score
+        self.recording.drops = game_scene.game_state.ball_dropped
+        self.recording.outcome = game_scene.game_over
+
+    def save(self):
+        self.recording.save(self.path)
+
+
+class ReplayMismatch(Exception):
+    pass
+
+
+def replay(recording):
+    """Play a recording back as fast as possible, checking it ends the same way
+
+    The game runs on a clock that reads the recorded frame times, so the
+    measurement cooldown opens on the same frames. Raises ReplayMismatch at
+    the first measurement, or final result, that differs from the recording.
+    Returns the replayed GameScene and the seconds it took.
+    """
+    if recording.num_qubits != globals.NUM_QUBITS:
+        raise ReplayMismatch(
+            "recorded with "
+            + str(recording.num_qubits)
+            + " qubits, running with "
+            + str(globals.NUM_QUBITS)
+        )
+    clock = LatchedClock(lambda: 0)
+    game_scene = scene.GameScene(get_ticks=clock.get_ticks, seed=recording.seed)
+    quantum_computer = game_scene.quantum_computer
+
+    start = time.perf_counter()
+    for frame_num, (ticks, keys, measured_state) in enumerate(recording.frames):
+        clock.ticks = ticks
+        last_measurement_time = quantum_computer.last_measurement_time
+        game_scene.step(keys)
+        if quantum_computer.last_measurement_time != last_measurement_time:
+            replayed_state = quantum_computer.measured_state
+        else:
+            replayed_state = None
+        if replayed_state != measured_state:
+            raise ReplayMismatch(
+                "frame "
+                + str(frame_num)
+                + ": measured "
+                + str(replayed_state)
+                + ", recorded "
+                + str(measured_state)
+            )
+    elapsed = time.perf_counter() - start
+    quantum_computer.close()
+
+    replayed = (
+        game_scene.game_state.player_score,
+        game_scene.game_state.ball_dropped,
+        game_scene.game_over,
+    )
+    recorded = (recording.score, recording.drops, recording.outcome)
+    if replayed != recorded:
+        raise ReplayMismatch(
+            "ended with (score, drops, outcome) "
+            + str(replayed)
+            + ", recorded "
+            + str(recorded)
+        )
+    return game_scene, elapsed
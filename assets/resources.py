@@ -1,4 +1,6 @@
+import io
 import os
+from functools import lru_cache
 
 import pygame
 
@@ -6,9 +8,28 @@ from . import globals
 
 data_dir = os.path.split(os.path.abspath(__file__))[0]
 
+# Contents of the image files read ahead by preload_image_files, by the name load_image takes
+image_files = {}
+
+
+def preload_image_files(directory=""):
+    """Read the PNGs of an images subdirectory into memory for load_image to decode
+
+    Only file bytes are read, no surfaces are made, so this can run on a
+    background thread.
+    """
+    for file_name in sorted(os.listdir(os.path.join(data_dir, "images", directory))):
+        if file_name.endswith(".png"):
+            name = directory + "/" + file_name if directory else file_name
+            with open(os.path.join(data_dir, "images", name), "rb") as file:
+                image_files[name] = file.read()
+
+
 def load_image(name, colorkey=None):
-    fullname = os.path.join(data_dir, "images", name)
-    image = pygame.image.load(fullname)
+    if name in image_files:
+        image = pygame.image.load(io.BytesIO(image_files[name]), name)
+    else:
+        image = pygame.image.load(os.path.join(data_dir, "images", name))
     if colorkey is not None:
         if colorkey == -1:
             colorkey = image.get_at((0,0))
@@ -16,6 +37,16 @@ def load_image(name, colorkey=None):
     return image, image.get_rect()
 
 
+def load_images(directory, colorkey=None):
+    """Load every PNG in an images subdirectory, keyed by the name load_image takes"""
+    images = {}
+    for file_name in sorted(os.listdir(os.path.join(data_dir, "images", directory))):
+        if file_name.endswith(".png"):
+            name = directory + "/" + file_name
+            images[name] = load_image(name, colorkey)[0]
+    return images
+
+
 def load_font(name, size=2 * globals.WIDTH_UNIT):
     if not pygame.font.get_init():
         pygame.font.init()
@@ -24,11 +55,35 @@ def load_font(name, size=2 * globals.WIDTH_UNIT):
     font = pygame.font.Font(full_name, size)
     return font
 
+# Fonts already loaded, by (file name, size)
+fonts = {}
+
+
+def get_font(name, size=2 * globals.WIDTH_UNIT):
+    """Return the font, loading it from disk only the first time"""
+    if (name, size) not in fonts:
+        fonts[(name, size)] = load_font(name, size)
+    return fonts[(name, size)]
+
+
+@lru_cache(maxsize=256)
+def _render_text(font, text, color, antialias):
+    return font.render(text, antialias, color)
+
+
+def render_text(font, text, color, antialias=True):
+    """Render text, reusing the surface while the same text is drawn
+
+    The surface is shared, so callers must not draw on it.
+    """
+    return _render_text(font, text, tuple(color), bool(antialias))
+
+
 class Font:
     def __init__(self):
-        self.gameover_font = load_font("bit5x3.ttf", 10 * globals.WIDTH_UNIT)
-        self.credit_font = load_font("bit5x3.ttf", 2 * globals.WIDTH_UNIT)
-        self.replay_font = load_font("bit5x3.ttf", 5 * globals.WIDTH_UNIT)
-        self.score_font = load_font("bit5x3.ttf", 12 * globals.WIDTH_UNIT)
-        self.vector_font = load_font("bit5x3.ttf", 3 * globals.WIDTH_UNIT)
-        self.player_font = load_font("bit5x3.ttf", 3 * globals.WIDTH_UNIT)
+        self.gameover_font = get_font("bit5x3.ttf", 10 * globals.WIDTH_UNIT)
+        self.credit_font = get_font("bit5x3.ttf", 2 * globals.WIDTH_UNIT)
+        self.replay_font = get_font("bit5x3.ttf", 5 * globals.WIDTH_UNIT)
+        self.score_font = get_font("bit5x3.ttf", 12 * globals.WIDTH_UNIT)
+        self.vector_font = get_font("bit5x3.ttf", 3 * globals.WIDTH_UNIT)
+        self.player_font = get_font("bit5x3.ttf", 3 * globals.WIDTH_UNIT)
@@ -1,7 +1,19 @@
+import random
+import threading
+
 import pygame
 
 from assets.circuit_grid import CircuitGrid
-from assets import globals, ui, paddle, ball, computer, resources, bricks
+from assets import globals, ui, paddle, ball, computer, resources, bricks, game_state, collision, startup
+from assets import profiler as profiling
+from assets.profiler import profiler
+
+# GameScene outcomes
+WON = "won"
+LOST = "lost"
+
+# Key showing or hiding the profiler overlay
+PROFILER_KEY = pygame.K_F3
 
 class Scene:
     def __init__(self) -> None:
@@ -10,94 +22,262 @@ class Scene:
         pass
     def draw(self, sm, screen):
         pass
+    def draw_dirty(self, sm, screen, full_redraw):
+        # Draw the frame and return the changed screen areas: by default all of it
+        screen.fill(globals.BLACK)
+        self.draw(sm, screen)
+        return [screen.get_rect()]
 
 class SceneManager:
     def __init__(self) -> None:
         self.scenes = []
         self.exit = False
+        # Scene drawn last frame, so a new scene gets a full redraw
+        self.drawn_scene = None
+        self.profiler_overlay = ui.ProfilerOverlay()
     def update(self):
+        profiler.begin_frame()
         if len(self.scenes) > 0:
             self.scenes[-1].update(self)
 
+    def toggle_profiler(self):
+        profiler.toggle()
+        # Repaint the area under the overlay when it goes away
+        self.drawn_scene = None
+
     def draw(self, screen):
+        if globals.DIRTY_RECT_RENDERING:
+            self.draw_dirty(screen)
+            profiler.end_frame()
+            return
+        start = profiler.start()
         screen.fill(globals.BLACK) # Clear the frame after every second and redraw updated objects
         if len(self.scenes) > 0:
             self.scenes[-1].draw(self, screen)
+        profiler.stop(profiling.DRAW, start)
+        if profiler.enabled:
+            self.profiler_overlay.draw(screen, profiler)
+        start = profiler.start()
         pygame.display.flip()
+        profiler.stop(profiling.FLIP, start)
+        profiler.end_frame()
+
+    def draw_dirty(self, screen):
+        # Only send the areas the scene changed to the display
+        if len(self.scenes) == 0:
+            return
+        scene = self.scenes[-1]
+        full_redraw = scene is not self.drawn_scene
+        self.drawn_scene = scene
+        start = profiler.start()
+        dirty_rects = scene.draw_dirty(self, screen, full_redraw)
+        profiler.stop(profiling.DRAW, start)
+        if profiler.enabled:
+            dirty_rects.append(self.profiler_overlay.draw(screen, profiler))
+        start = profiler.start()
+        if full_redraw:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        profiler.stop(profiling.FLIP, start)
     def push(self, scene):
         self.scenes.append(scene)
 
+class LoadingScene(Scene):
+    def __init__(self, make_scene, profile=None) -> None:
+        super().__init__()
+        # Shown while assets and the simulator warm up on a background thread,
+        # then replaced by make_scene()
+        self.make_scene = make_scene
+        self.profile = profile
+        font = resources.get_font("bit5x3.ttf", 5 * globals.WIDTH_UNIT)
+        self.text = resources.render_text(font, "Loading...", globals.WHITE, 5)
+        self.thread = threading.Thread(target=startup.warm_up, args=(profile,), daemon=True)
+        self.thread.start()
+
+    def update(self, sm):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sm.exit = True
+        if not self.thread.is_alive():
+            # Surfaces are only made on this thread
+            if self.profile:
+                with self.profile.stage("fonts"):
+                    resources.Font()
+                with self.profile.stage("game scene"):
+                    game_scene = self.make_scene()
+            else:
+                game_scene = self.make_scene()
+            sm.push(game_scene)
+
+    def draw(self, sm, screen):
+        text_pos = self.text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WINDOW_HEIGHT/2))
+        screen.blit(self.text, text_pos)
+
 class GameScene(Scene):
-    def __init__(self) -> None:
+    def __init__(self, get_ticks=pygame.time.get_ticks, seed=None, recorder=None) -> None:
         super().__init__()
+        # A recorded game runs on the recorder's clock and seed
+        self.recorder = recorder
+        if recorder:
+            get_ticks = recorder.clock.get_ticks
+            seed = recorder.recording.seed
+        # Score and drops of this game only
+        self.game_state = game_state.GameState()
         self.circuit_grid = CircuitGrid(5, globals.FIELD_HEIGHT)
         self.quantum_paddles = paddle.QuantumPaddles(globals.STATEVECTOR_WIDTH)
-        self.quantum_computer = computer.QuantumComputer(self.quantum_paddles, self.circuit_grid)
-        self.game_ball = ball.Ball()
-        self.brick_layers = bricks.BricksLayers()
+        self.quantum_computer = computer.QuantumComputer(self.quantum_paddles, self.circuit_grid, seed=seed, get_ticks=get_ticks)
+        self.game_ball = ball.Ball(self.game_state)
+        # A seeded game draws its brick colors from its own generator
+        self.brick_layers = bricks.BricksLayers(rng=random if seed is None else random.Random(seed))
         self.moving_sprites = pygame.sprite.Group()
-        self.moving_sprites.add(self.quantum_paddles.paddles)
         self.moving_sprites.add(self.game_ball)
+
+        # Used instead of draw() with dirty-rect rendering: static parts are kept
+        # in a background layer and only changed sprites are redrawn over it
+        self.background = None
+        self.score_sprite = ui.ScoreSprite()
+        self.dirty_sprites = pygame.sprite.LayeredDirty()
+        self.dirty_sprites.add(self.score_sprite)
+        self.dirty_sprites.add(self.quantum_paddles.paddles)
+        self.dirty_sprites.add(self.game_ball)
+        self.dirty_sprites.add(self.brick_layers.bricks)
+
+        # Set to WON or LOST by step() when the game ends
+        self.game_over = None
         
     
     def update(self, sm):
+        start = profiler.start()
+        keys = []
         for event in pygame.event.get():
             ## Detect Close and Exit
             if event.type == pygame.QUIT:
                 sm.exit = True
             elif event.type == pygame.KEYDOWN:
-                self.circuit_grid.handle_input(event.key)
+                if event.key == PROFILER_KEY:
+                    sm.toggle_profiler()
+                else:
+                    keys.append(event.key)
             
             # if event.type == pygame.K_p:
             #     print("pressed Pause")
             #     sm.push(PauseScene())
+        profiler.stop(profiling.EVENTS, start)
 
-        self.game_ball.update(self.quantum_computer)
-        self.quantum_computer.update(self.game_ball)
+        if self.recorder:
+            self.recorder.start_frame()
+            last_measurement_time = self.quantum_computer.last_measurement_time
+        self.step(keys)
+        if self.recorder:
+            measured = self.quantum_computer.last_measurement_time != last_measurement_time
+            self.recorder.record_frame(self, keys, self.quantum_computer.measured_state if measured else None)
+            if self.game_over:
+                self.recorder.save()
 
-        ## Collision of Ball and Bricks
-        for brick in self.brick_layers.bricks:
-            ball_x = self.game_ball.rect.x
-            ball_y = self.game_ball.rect.y
-            brick_x = brick.rect.x
-            brick_y = brick.rect.y
-            if (ball_x >= brick_x and ball_x <= (brick_x + globals.BRICK_WIDTH)) or ((ball_x + globals.BALL_SIZE) >= brick_x and (ball_x + globals.BALL_SIZE) <= (brick_x + globals.BRICK_WIDTH)):
-                if (ball_y >= brick_y and ball_y <= (brick_y + globals.BRICK_HEIGHT)) or ((ball_y + globals.BALL_SIZE) >= brick_y and (ball_y + globals.BALL_SIZE) <= (brick_y + globals.BRICK_HEIGHT)):
-                    brick.visible = False
-                    self.brick_layers.bricks.pop(self.brick_layers.bricks.index(brick))
-                    self.game_ball.bounce()
-                    # Increase Player Score
-                    globals.player_score += 1
-        
         ## WIN CONDITION
-        if globals.player_score >= globals.WIN_SCORE:
+        if self.game_over == WON:
             print("Player won the game")
+            self.quantum_computer.close()
             sm.push(WinScene())
 
         ## LOSE CONDITION
-        if globals.ball_dropped >= globals.LOSE_SCORE:
+        if self.game_over == LOST:
             print("Player lose the game")
+            self.quantum_computer.close()
             sm.push(LoseScene())
 
+    def step(self, keys=(), dt=1):
+        # Advance the game by dt frames, with the keys pressed during them
+        start = profiler.start()
+        for key in keys:
+            self.circuit_grid.handle_input(key)
+        profiler.stop(profiling.INPUT, start)
+
+        if globals.CONTINUOUS_COLLISION:
+            self.step_continuous(dt)
+        elif dt != 1:
+            raise ValueError("Steps of more than one frame need globals.CONTINUOUS_COLLISION")
+        else:
+            self.step_discrete()
+
+        if self.game_state.player_score >= globals.WIN_SCORE:
+            self.game_over = WON
+        elif self.game_state.ball_dropped >= globals.LOSE_SCORE:
+            self.game_over = LOST
+
+    def _remove_hit_bricks(self, hit_bricks):
+        # Shared by both collision modes so they score the same way
+        for brick in hit_bricks:
+            self.brick_layers.remove(brick)
+            # Increase Player Score
+            self.game_state.player_score += 1
+
+    def step_discrete(self):
+        # Move the ball a frame, then test it against the paddle and bricks where it landed
+        self.game_ball.update(self.quantum_computer)
+        start = profiler.start()
+        self.quantum_computer.update(self.game_ball)
+        profiler.stop(profiling.COMPUTER, start)
+
+        ## Collision of Ball and Bricks
+        # Only the bricks in the cells around the ball are tested
+        start = profiler.start()
+        hit_bricks = self.brick_layers.collide(self.game_ball.rect)
+        self._remove_hit_bricks(hit_bricks)
+        if hit_bricks:
+            self.game_ball.bounce()
+        profiler.stop(profiling.BRICKS, start)
+
+    def step_continuous(self, dt):
+        # Sweep the ball along its path, bouncing off the first wall, brick or paddle it reaches
+        start = profiler.start()
+        self.quantum_computer.update_measurement(self.game_ball)
+        profiler.stop(profiling.COMPUTER, start)
+
+        start = profiler.start()
+        hit_bricks = collision.move_ball(
+            self.game_ball, self.brick_layers, self.quantum_computer.get_active_paddle,
+            globals.WINDOW_HEIGHT * 0.55, lambda: self.quantum_computer.update_measurement(self.game_ball), dt)
+        self._remove_hit_bricks(hit_bricks)
+        self.game_ball.check_dropped()
+        profiler.stop(profiling.BRICKS, start)
+
 
     def draw(self, sm, screen):
         self.circuit_grid.draw(screen)
         ui.draw_statevector_grid(screen)
-        ui.draw_score(screen, globals.player_score)
+        ui.draw_score(screen, self.game_state.player_score)
+        self.quantum_paddles.visible_paddles.draw(screen)
         self.moving_sprites.draw(screen)
 
         for brick in self.brick_layers.bricks:
             brick.draw(screen)
 
+    def draw_dirty(self, sm, screen, full_redraw):
+        if full_redraw:
+            self.background = pygame.Surface(screen.get_size()).convert()
+            self.background.fill(globals.BLACK)
+            self.circuit_grid.draw(self.background)
+            self.circuit_grid.pop_dirty_rects()
+            ui.draw_statevector_grid(self.background)
+            ui.draw_score_label(self.background)
+            screen.blit(self.background, (0, 0))
+            self.dirty_sprites.clear(screen, self.background)
+            self.dirty_sprites.repaint_rect(screen.get_rect())
+        else:
+            # Circuit edits change the background, repaint those areas
+            for dirty_rect in self.circuit_grid.draw_dirty(self.background):
+                self.dirty_sprites.repaint_rect(dirty_rect)
+
+        self.score_sprite.set_score(self.game_state.player_score)
+        return self.dirty_sprites.draw(screen)
+
 class LoseScene(Scene):
     def __init__(self) -> None:
         super().__init__()
 
     def update(self, sm):
-        # RESET PLAYER DATA
-        globals.player_score = 0
-        globals.ball_dropped = 0
-
         # DETECT KEY PRESS AND DO ACTION
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -111,12 +291,12 @@ class LoseScene(Scene):
         font = resources.Font()
 
         gameover_text = "Game Over"
-        text = font.gameover_font.render(gameover_text, 1, globals.WHITE)
+        text = resources.render_text(font.gameover_font, gameover_text, globals.WHITE, 1)
         text_pos = text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WIDTH_UNIT*20))
         screen.blit(text, text_pos)
 
         gameover_text = "Press Space to Replay!"
-        text = font.replay_font.render(gameover_text, 5, globals.WHITE)
+        text = resources.render_text(font.replay_font, gameover_text, globals.WHITE, 5)
         text_pos = text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WIDTH_UNIT*30))
         screen.blit(text, text_pos)
 
@@ -126,10 +306,6 @@ class WinScene(Scene):
 
     def update(self, sm):
         for event in pygame.event.get():
-            # RESET PLAYER DATA
-            globals.player_score = 0
-            globals.ball_dropped = 0
-
             # DETECT KEY PRESS AND DO ACTION
             if event.type == pygame.QUIT:
                 sm.exit = True
@@ -142,17 +318,17 @@ class WinScene(Scene):
         font = resources.Font()
 
         gameover_text = "Congratulations!"
-        text = font.gameover_font.render(gameover_text, 5, globals.WHITE)
+        text = resources.render_text(font.gameover_font, gameover_text, globals.WHITE, 5)
         text_pos = text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WIDTH_UNIT*20))
         screen.blit(text, text_pos)
 
         gameover_text = "You demonstrated quantum advantage"
-        text = font.replay_font.render(gameover_text, 5, globals.WHITE)
+        text = resources.render_text(font.replay_font, gameover_text, globals.WHITE, 5)
         text_pos = text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WIDTH_UNIT*30))
         screen.blit(text, text_pos)
 
         gameover_text = "Press Space to Replay!"
-        text = font.replay_font.render(gameover_text, 5, globals.WHITE)
+        text = resources.render_text(font.replay_font, gameover_text, globals.WHITE, 5)
         text_pos = text.get_rect(center=(globals.WINDOW_WIDTH/2, globals.WIDTH_UNIT*35))
         screen.blit(text, text_pos)
 
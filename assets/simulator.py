@@ -0,0 +1,77 @@
+import numpy as np
+
+from . import compiler
+from .profiler import CIRCUIT, TRANSPILE, profiler
+
+
+class NumpySimulator:
+    """Statevector simulator applying the grid's gates directly with NumPy
+
+    The grid is fused into a single unitary by a CircuitCompiler, so the
+    statevector is one matrix-vector product with |0...0>. Larger circuits
+    are propagated column by column instead.
+    """
+
+    name = "numpy"
+
+    def __init__(self):
+        self.compiler = compiler.CircuitCompiler()
+
+    def get_statevector(self, circuit_grid_model):
+        return self.compiler.get_statevector(circuit_grid_model)
+
+
+class QiskitSimulator:
+    """Reference simulator running the circuit on Qiskit's BasicAer backends
+
+    The grid is simulated as drawn. With optimize the circuit is simplified
+    first, and removed_gates counts the gates this dropped from the last
+    circuit; the result then only matches up to a global phase, and on
+    typical grids Qiskit's own overhead outweighs the gates saved.
+    """
+
+    name = "qiskit"
+
+    def __init__(self, optimize=False):
+        # Imported only once this engine is selected, as it takes seconds
+        import qiskit
+
+        self.qiskit = qiskit
+        self.optimize = optimize
+        self.removed_gates = 0
+
+    def get_statevector(self, circuit_grid_model):
+        simulator = self.qiskit.BasicAer.get_backend("statevector_simulator")
+        start = profiler.start()
+        if self.optimize:
+            operations, self.removed_gates = (
+                circuit_grid_model.compute_optimized_operations()
+            )
+        else:
+            operations = circuit_grid_model.compute_operations()
+        circuit = circuit_grid_model.compute_circuit(operations)
+        profiler.stop(CIRCUIT, start)
+        start = profiler.start()
+        transpiled_circuit = self.qiskit.transpile(circuit, simulator)
+        profiler.stop(TRANSPILE, start)
+        statevector = (
+            simulator.run(transpiled_circuit, shots=100).result().get_statevector()
+        )
+        return np.asarray(statevector)
+
+
+SIMULATORS = {
+    NumpySimulator.name: NumpySimulator,
+    QiskitSimulator.name: QiskitSimulator,
+}
+
+
+def get_simulator(name):
+    if name not in SIMULATORS:
+        raise ValueError(
+            "Unknown simulator engine: "
+            + str(name)
+            + ", expected one of "
+            + ", ".join(SIMULATORS)
+        )
+    return SIMULATORS[name]()
@@ -0,0 +1,40 @@
+class SpatialGrid:
+    """Uniform grid of buckets indexing sprites by the cells their rect touches
+
+    Rects are treated as closed, so a sprite whose edge only touches a query
+    rect is still returned, like the interval checks it replaces.
+    """
+
+    def __init__(self, cell_width, cell_height):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        # (column, row) -> sprites in that cell, in insertion order
+        self.cells = {}
+
+    def get_cells(self, rect):
+        columns = range(rect.left // self.cell_width, rect.right // self.cell_width + 1)
+        rows = range(rect.top // self.cell_height, rect.bottom // self.cell_height + 1)
+        for column in columns:
+            for row in rows:
+                yield column, row
+
+    def add(self, sprite):
+        for cell in self.get_cells(sprite.rect):
+            self.cells.setdefault(cell, {})[sprite] = None
+
+    def remove(self, sprite):
+        for cell in self.get_cells(sprite.rect):
+            sprites = self.cells.get(cell)
+            if sprites is not None:
+                sprites.pop(sprite, None)
+                if not sprites:
+                    del self.cells[cell]
+
+    def query(self, rect):
+        """Return the sprites sharing a cell with rect, without duplicates"""
+        found = {}
+        for cell in self.get_cells(rect):
+            sprites = self.cells.get(cell)
+            if sprites:
+                found.update(sprites)
+        return list(found)
@@ -0,0 +1,65 @@
+import contextlib
+import threading
+import time
+
+from . import circuit_grid, globals, resources, simulator
+
+
+class StartupProfile:
+    """Start offset and duration of each startup stage, for --profile-startup
+
+    Stages may run on several threads and overlap. Offsets are measured
+    from start_time, which callers take as early as they can.
+    """
+
+    def __init__(self, start_time=None):
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        # (name, start, end) of each finished stage
+        self.stages = []
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end=None):
+        if end is None:
+            end = time.perf_counter()
+        with self.lock:
+            self.stages.append((name, start, end))
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start)
+
+    def report(self):
+        """Lines listing each stage by start, with its offset and duration in ms"""
+        lines = ["%-24s %10s %10s" % ("stage", "start ms", "took ms")]
+        with self.lock:
+            stages = sorted(self.stages, key=lambda stage: stage[1])
+        for name, start, end in stages:
+            lines.append(
+                "%-24s %10.1f %10.1f"
+                % (name, (start - self.start_time) * 1000, (end - start) * 1000)
+            )
+        return lines
+
+
+def warm_up(profile=None):
+    """Read the game's image files and run the simulator once, so the first game starts fast
+
+    Meant to run on a background thread while a loading screen is shown, so
+    it makes no pygame surfaces: the fonts, gate tiles and the GameScene
+    are built on the main thread afterwards, from the files read here.
+    """
+    if profile is None:
+        profile = StartupProfile()
+    with profile.stage("image files"):
+        resources.preload_image_files()
+        resources.preload_image_files("gates")
+    with profile.stage("simulator " + globals.SIMULATOR_ENGINE):
+        circuit_grid_model = circuit_grid.CircuitGridModel(globals.NUM_QUBITS, 16)
+        simulator.get_simulator(globals.SIMULATOR_ENGINE).get_statevector(
+            circuit_grid_model
+        )
+    return profile
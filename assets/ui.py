@@ -1,6 +1,9 @@
+import math
+
 import pygame
 
 from . import globals, resources
+from . import profiler as profiling
 
 def draw_statevector_grid(screen):
     font = resources.Font()
@@ -9,18 +12,84 @@ def draw_statevector_grid(screen):
     statevector_width = globals.STATEVECTOR_WIDTH
     statevector_height = globals.STATEVECTOR_HEIGHT
 
-    for i in range(len(basis_states)):
-        text = font.vector_font.render(basis_states[i], 1, globals.WHITE)
+    # With many qubits the labels don't fit under every state, so only every few are drawn
+    label_width = font.vector_font.size(basis_states[0])[0]
+    label_step = max(1, math.ceil(label_width / statevector_width))
+
+    for i in range(0, len(basis_states), label_step):
+        text = resources.render_text(font.vector_font, basis_states[i], globals.WHITE, 1)
         screen.blit(text, (i*statevector_width + text.get_width() / 2,
                            statevector_height + text.get_height()))
 
-def draw_score(screen, quantum_score):
+def draw_score_label(screen):
     font = resources.Font()
 
-    text = font.player_font.render("Score", 1, globals.GRAY)
+    text = resources.render_text(font.player_font, "Score", globals.GRAY, 1)
     text_pos = text.get_rect(center=(globals.WINDOW_WIDTH*0.5, globals.WINDOW_HEIGHT*0.3))
     screen.blit(text, text_pos)
 
-    text = font.score_font.render(str(quantum_score), 1, globals.GRAY)
+def draw_score(screen, quantum_score):
+    draw_score_label(screen)
+
+    font = resources.Font()
+    text = resources.render_text(font.score_font, str(quantum_score), globals.GRAY, 1)
     text_pos = text.get_rect(center=(globals.WINDOW_WIDTH*0.51, globals.WINDOW_HEIGHT*0.4))
-    screen.blit(text, text_pos)
\ No newline at end of file
+    screen.blit(text, text_pos)
+
+class ScoreSprite(pygame.sprite.DirtySprite):
+    """Score digits, re-rendered only when the score changes"""
+
+    def __init__(self):
+        super().__init__()
+        self.score = None
+        self.set_score(0)
+
+    def set_score(self, quantum_score):
+        if quantum_score == self.score:
+            return
+        self.score = quantum_score
+        font = resources.Font()
+        self.image = resources.render_text(font.score_font, str(quantum_score), globals.GRAY, 1)
+        self.rect = self.image.get_rect(center=(globals.WINDOW_WIDTH*0.51, globals.WINDOW_HEIGHT*0.4))
+        self.dirty = 1
+
+class ProfilerOverlay:
+    """Table of p50/p95/p99 milliseconds per profiled section, drawn over the game"""
+
+    def __init__(self, refresh_interval=30):
+        # Percentiles are recomputed and re-rendered only every few frames
+        self.refresh_interval = refresh_interval
+        self.refreshed_frame = None
+        self.image = None
+
+    def refresh(self, profiler):
+        font = resources.Font().credit_font
+        percentiles = profiler.get_percentiles()
+        rows = [("ms", "p50", "p95", "p99")]
+        for index, name in enumerate(profiling.SECTIONS):
+            rows.append((name,) + tuple("%.2f" % value for value in percentiles[:, index]))
+
+        # The font isn't monospaced, so each column is laid out separately
+        line_height = font.get_linesize()
+        column_widths = [max(font.size(row[i])[0] for row in rows) + globals.WIDTH_UNIT for i in range(4)]
+        self.image = pygame.Surface((sum(column_widths) + globals.WIDTH_UNIT, line_height * len(rows) + globals.WIDTH_UNIT))
+        self.image.fill(globals.BLACK)
+        for row_num, row in enumerate(rows):
+            x = globals.WIDTH_UNIT
+            for column_num, text in enumerate(row):
+                image = font.render(text, False, globals.WHITE)
+                if column_num == 0:
+                    self.image.blit(image, (x, row_num * line_height))
+                else:
+                    # Numbers are right-aligned
+                    self.image.blit(image, (x + column_widths[column_num] - image.get_width() - globals.WIDTH_UNIT, row_num * line_height))
+                x += column_widths[column_num]
+        self.refreshed_frame = profiler.frames
+
+    def draw(self, screen, profiler):
+        """Draw the overlay in the top right corner and return its rect"""
+        if self.image is None or profiler.frames - self.refreshed_frame >= self.refresh_interval:
+            self.refresh(profiler)
+        rect = self.image.get_rect(topright=(globals.WINDOW_WIDTH, 0))
+        screen.blit(self.image, rect)
+        return rect
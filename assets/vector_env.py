@@ -0,0 +1,192 @@
+import numpy as np
+
+from . import ball, bricks, computer, game_state, globals, paddle, simulator
+from .circuit_grid import CircuitGridModel
+from .headless import FRAME_TIME
+
+
+class VectorEnv:
+    """Many headless games stepped together as NumPy arrays
+
+    Ball positions and velocities, scores, drops, measured states and the
+    bricks still standing are kept as one array per field with one row per
+    game. Every frame moves all the balls, bounces them off the walls,
+    paddles and bricks, and resets dropped balls in a few array operations.
+    A game stops once it is won or lost.
+
+    Each game follows the same rules, in the same order, as a GameScene
+    stepped headlessly with the same seed, and produces the same positions,
+    scores and measurements. Games whose circuit models are equal share one
+    cached statevector.
+    """
+
+    def __init__(self, num_envs, seeds=None, circuit_grid_models=None):
+        self.num_envs = num_envs
+        if seeds is None:
+            seeds = [None] * num_envs
+        self.seeds = list(seeds)
+        if circuit_grid_models is None:
+            circuit_grid_models = [
+                CircuitGridModel(globals.NUM_QUBITS, 16) for _ in range(num_envs)
+            ]
+        self.circuit_grid_models = circuit_grid_models
+
+        # Lay the field out with the sprite classes so both versions agree
+        reference_ball = ball.Ball(game_state.GameState())
+        self.ball_size = reference_ball.rect.width
+        self.reset_position = (reference_ball.rect.x, reference_ball.rect.y)
+        self.reset_velocity = tuple(reference_ball.velocity[:2])
+        paddle_rects = [
+            sprite.rect
+            for sprite in paddle.QuantumPaddles(globals.STATEVECTOR_WIDTH).paddles
+        ]
+        self.paddle_x = np.array([rect.x for rect in paddle_rects])
+        self.paddle_y = paddle_rects[0].y
+        self.paddle_width = paddle_rects[0].width
+        self.paddle_height = paddle_rects[0].height
+        brick_positions = np.array(bricks.brick_positions(), dtype=np.int64)
+        self.brick_left = brick_positions[:, 0]
+        self.brick_top = brick_positions[:, 1]
+        self.brick_right = self.brick_left + globals.BRICK_WIDTH
+        self.brick_bottom = self.brick_top + globals.BRICK_HEIGHT
+
+        self.statevector_cache = computer.StatevectorCache(
+            simulator.get_simulator(globals.SIMULATOR_ENGINE)
+        )
+
+        self.ball_x = np.zeros(num_envs, dtype=np.int64)
+        self.ball_y = np.zeros(num_envs, dtype=np.int64)
+        self.velocity_x = np.zeros(num_envs, dtype=np.int64)
+        self.velocity_y = np.zeros(num_envs, dtype=np.int64)
+        self.bricks_alive = np.zeros((num_envs, len(brick_positions)), dtype=bool)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.drops = np.zeros(num_envs, dtype=np.int64)
+        self.frames = np.zeros(num_envs, dtype=np.int64)
+        self.measured_state = np.zeros(num_envs, dtype=np.int64)
+        self.last_measurement_time = np.zeros(num_envs, dtype=np.int64)
+        self.measurement_counts = np.zeros(
+            (num_envs, len(self.paddle_x)), dtype=np.int64
+        )
+        self.won = np.zeros(num_envs, dtype=bool)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.rngs = [None] * num_envs
+        self.reset()
+
+    def reset(self, env_indices=None):
+        """Start the given games, or all of them, over from their seeds"""
+        if env_indices is None:
+            env_indices = np.arange(self.num_envs)
+        self.ball_x[env_indices] = self.reset_position[0]
+        self.ball_y[env_indices] = self.reset_position[1]
+        self.velocity_x[env_indices] = self.reset_velocity[0]
+        self.velocity_y[env_indices] = self.reset_velocity[1]
+        self.bricks_alive[env_indices] = True
+        self.score[env_indices] = 0
+        self.drops[env_indices] = 0
+        self.frames[env_indices] = 0
+        self.measured_state[env_indices] = 0
+        self.last_measurement_time[env_indices] = -globals.MEASUREMENT_COOLDOWN_TIME
+        self.measurement_counts[env_indices] = 0
+        self.won[env_indices] = False
+        self.done[env_indices] = False
+        for env_index in env_indices:
+            seed = self.seeds[env_index]
+            self.rngs[env_index] = np.random.default_rng(
+                globals.MEASUREMENT_SEED if seed is None else seed
+            )
+
+    def step(self):
+        """Advance every unfinished game by one frame, returning the done mask"""
+        active = ~self.done
+        ball_size = self.ball_size
+
+        # Ball.update: move, bounce off the walls and reset when dropped
+        self.ball_x += np.where(active, self.velocity_x, 0)
+        self.ball_y += np.where(active, self.velocity_y, 0)
+        self.velocity_y[active & (self.ball_y < 0)] *= -1
+        hits_wall = (self.ball_x < 0) | (self.ball_x > globals.WINDOW_WIDTH - ball_size)
+        self.velocity_x[active & hits_wall] *= -1
+        dropped = active & (self.ball_y > globals.FIELD_HEIGHT + ball_size)
+        self.ball_x[dropped] = self.reset_position[0]
+        self.ball_y[dropped] = self.reset_position[1]
+        self.velocity_x[dropped] = self.reset_velocity[0]
+        self.velocity_y[dropped] = self.reset_velocity[1]
+        self.drops += dropped
+
+        # QuantumComputer.update: measure near the paddles once the cooldown is over
+        ticks = (self.frames * FRAME_TIME).astype(np.int64)
+        measuring = (
+            active
+            & (self.ball_y > globals.WINDOW_HEIGHT * 0.55)
+            & (ticks - self.last_measurement_time > globals.MEASUREMENT_COOLDOWN_TIME)
+        )
+        measuring_indices = np.flatnonzero(measuring)
+        if len(measuring_indices):
+            self.measure(measuring_indices)
+            self.last_measurement_time[measuring_indices] = ticks[measuring_indices]
+
+        # Ball bounces off the paddle of the measured state when they overlap
+        paddle_left = self.paddle_x[self.measured_state]
+        hits_paddle = (
+            active
+            & (self.ball_x < paddle_left + self.paddle_width)
+            & (paddle_left < self.ball_x + ball_size)
+            & (self.ball_y < self.paddle_y + self.paddle_height)
+            & (self.paddle_y < self.ball_y + ball_size)
+        )
+        self.velocity_y[hits_paddle] *= -1
+
+        # Bricks touching the ball, edges included, are removed and scored
+        ball_x = self.ball_x[:, None]
+        ball_y = self.ball_y[:, None]
+        hit_bricks = (
+            self.bricks_alive
+            & (self.brick_left <= ball_x + ball_size)
+            & (ball_x <= self.brick_right)
+            & (self.brick_top <= ball_y + ball_size)
+            & (ball_y <= self.brick_bottom)
+        )
+        hit_bricks &= active[:, None]
+        self.bricks_alive &= ~hit_bricks
+        hit_counts = hit_bricks.sum(axis=1)
+        self.score += hit_counts
+        self.velocity_y[hit_counts > 0] *= -1
+
+        self.frames += active
+        self.won |= active & (self.score >= globals.WIN_SCORE)
+        self.done |= self.won | (active & (self.drops >= globals.LOSE_SCORE))
+        return self.done
+
+    def measure(self, env_indices):
+        """Collapse the circuits of the given games, drawing once per game"""
+        draws = np.array([self.rngs[env_index].random() for env_index in env_indices])
+        # Games sharing a circuit are measured against one set of probabilities
+        groups = {}
+        for position, env_index in enumerate(env_indices):
+            key = self.circuit_grid_models[env_index].get_key()
+            groups.setdefault(key, []).append(position)
+        for positions in groups.values():
+            positions = np.array(positions)
+            model = self.circuit_grid_models[env_indices[positions[0]]]
+            _, _, cumulative_probabilities = self.statevector_cache.get(model)
+            basis_states = np.searchsorted(
+                cumulative_probabilities,
+                draws[positions] * cumulative_probabilities[-1],
+                side="right",
+            )
+            np.minimum(
+                basis_states, len(cumulative_probabilities) - 1, out=basis_states
+            )
+            self.measured_state[env_indices[positions]] = basis_states
+            self.measurement_counts[env_indices[positions], basis_states] += 1
+
+    def get_probabilities(self):
+        """Measurement probabilities of every game's circuit, one row per game"""
+        probabilities = np.empty((self.num_envs, len(self.paddle_x)))
+        rows = {}
+        for env_index, model in enumerate(self.circuit_grid_models):
+            key = model.get_key()
+            if key not in rows:
+                rows[key] = self.statevector_cache.get(model)[1]
+            probabilities[env_index] = rows[key]
+        return probabilities
@@ -0,0 +1,207 @@
+"""Play many headless games in parallel and report aggregate statistics
+
+Episodes are spread over a process pool. Episode i is seeded with
+--seed + i, which fixes its brick colors, measurements and policy inputs
+whichever worker runs it. Results are written to --output as .npz chunks
+with one array per column:
+
+    seed, outcome (1 won, 0 lost, -1 unfinished), score, drops, frames,
+    seconds, mean_frame_us, max_frame_us, measurement_counts
+
+Level parameters in assets.globals that are read while a game runs can be
+overridden with --set, for example:
+
+    python batch.py --episodes 1000 --set WIN_SCORE=10 --set BALL_SPEED=3
+"""
+
+import argparse
+import ast
+import concurrent.futures
+import os
+import random
+import time
+
+import numpy as np
+
+OUTCOMES = {"won": 1, "lost": 0, None: -1}
+
+POLICIES = ("idle", "random")
+
+# Per-process game and policy name, set by init_worker
+worker_game = None
+worker_policy = None
+
+
+def init_worker(overrides, policy):
+    global worker_game, worker_policy
+    from assets import globals, headless
+
+    headless.init_headless()
+    for name, value in overrides.items():
+        setattr(globals, name, value)
+    worker_game = headless.HeadlessGame()
+    worker_policy = policy
+
+
+def make_policy(name, seed):
+    from assets import headless
+
+    if name == "random":
+        return headless.RandomPolicy(random.Random(seed))
+    return headless.idle_policy
+
+
+def run_episode(seed, max_frames):
+    game = worker_game
+    game.policy = make_policy(worker_policy, seed)
+    game.reset(seed)
+
+    frame_times = np.empty(max_frames)
+    start = time.perf_counter()
+    frame_start = start
+    for frame in range(max_frames):
+        game_over = game.step()
+        frame_end = time.perf_counter()
+        frame_times[frame] = frame_end - frame_start
+        frame_start = frame_end
+        if game_over:
+            break
+    game.scene.quantum_computer.close()
+    frame_times = frame_times[: game.frames]
+
+    return (
+        seed,
+        OUTCOMES[game.scene.game_over],
+        game.scene.game_state.player_score,
+        game.scene.game_state.ball_dropped,
+        game.frames,
+        frame_start - start,
+        frame_times.mean() * 1e6,
+        frame_times.max() * 1e6,
+        game.scene.quantum_computer.measurement_counts.copy(),
+    )
+
+
+def run_episodes(seeds, max_frames):
+    return [run_episode(seed, max_frames) for seed in seeds]
+
+
+COLUMNS = (
+    ("seed", np.int64),
+    ("outcome", np.int8),
+    ("score", np.int32),
+    ("drops", np.int32),
+    ("frames", np.int32),
+    ("seconds", np.float64),
+    ("mean_frame_us", np.float32),
+    ("max_frame_us", np.float32),
+    ("measurement_counts", np.int32),
+)
+
+
+def to_columns(results):
+    columns = zip(*results)
+    return {
+        name: np.array(column, dtype=dtype)
+        for (name, dtype), column in zip(COLUMNS, columns)
+    }
+
+
+def parse_override(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE, got " + text)
+    return name, ast.literal_eval(value)
+
+
+def print_summary(columns, elapsed):
+    outcome = columns["outcome"]
+    frames = columns["frames"]
+    mean_frame_us = columns["mean_frame_us"]
+    print("episodes:", len(outcome))
+    print(
+        "won: %.1f%%  lost: %.1f%%  unfinished: %.1f%%"
+        % tuple(100 * np.mean(outcome == value) for value in (1, 0, -1))
+    )
+    print(
+        "score: mean %.2f  drops: mean %.2f  frames: mean %.0f"
+        % (columns["score"].mean(), columns["drops"].mean(), frames.mean())
+    )
+    print(
+        "frame latency (us): mean %.1f  p50 %.1f  p95 %.1f  p99 %.1f  max %.1f"
+        % (
+            np.average(mean_frame_us, weights=frames),
+            np.percentile(mean_frame_us, 50),
+            np.percentile(mean_frame_us, 95),
+            np.percentile(mean_frame_us, 99),
+            columns["max_frame_us"].max(),
+        )
+    )
+    print(
+        "throughput: %.1f episodes/s  %.0f frames/s  (%.2f s wall)"
+        % (len(outcome) / elapsed, frames.sum() / elapsed, elapsed)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--max-frames", type=int, default=100000)
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--batch-size", type=int, default=16, help="episodes sent to a worker at once"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1024, help="episodes per output file"
+    )
+    parser.add_argument("--output", help="directory for the .npz result chunks")
+    parser.add_argument(
+        "--set",
+        type=parse_override,
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="override a constant in assets.globals",
+    )
+    args = parser.parse_args()
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    seeds = range(args.seed, args.seed + args.episodes)
+    batches = [
+        seeds[i : i + args.batch_size] for i in range(0, len(seeds), args.batch_size)
+    ]
+
+    all_results = []
+    pending_results = []
+    chunk_num = 0
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+        args.workers, initializer=init_worker, initargs=(dict(args.set), args.policy)
+    ) as executor:
+        futures = [
+            executor.submit(run_episodes, batch, args.max_frames) for batch in batches
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            results = future.result()
+            all_results.extend(results)
+            pending_results.extend(results)
+            # Write full chunks as soon as they are available
+            while args.output and len(pending_results) >= args.chunk_size:
+                chunk = pending_results[: args.chunk_size]
+                del pending_results[: args.chunk_size]
+                path = os.path.join(args.output, "results_%05d.npz" % chunk_num)
+                np.savez_compressed(path, **to_columns(chunk))
+                chunk_num += 1
+    elapsed = time.perf_counter() - start
+
+    if args.output and pending_results:
+        path = os.path.join(args.output, "results_%05d.npz" % chunk_num)
+        np.savez_compressed(path, **to_columns(pending_results))
+    print_summary(to_columns(all_results), elapsed)
+
+
+if __name__ == "__main__":
+    main()
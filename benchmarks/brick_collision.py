@@ -0,0 +1,118 @@
+"""Compare per-frame ball-brick collision time: linear scan vs spatial grid
+
+python benchmarks/brick_collision.py --bricks 50 500 5000
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from assets import bricks, globals, spatial
+
+FIELD_TOP = 0
+FIELD_BOTTOM = 400
+
+
+def make_bricks(count):
+    """Lay count bricks out in a dense grid over the top of the field"""
+    columns = math.ceil(math.sqrt(count * 3))
+    rows = math.ceil(count / columns)
+    brick_width = globals.WINDOW_WIDTH // columns - 2
+    brick_height = (FIELD_BOTTOM - FIELD_TOP) // rows - 2
+    brick_sprites = []
+    for index in range(count):
+        brick = pygame.sprite.Sprite()
+        brick.rect = pygame.Rect(
+            (index % columns) * (brick_width + 2),
+            FIELD_TOP + (index // columns) * (brick_height + 2),
+            brick_width,
+            brick_height,
+        )
+        brick_sprites.append(brick)
+    return brick_sprites, brick_width, brick_height
+
+
+def linear_scan(brick_sprites, ball_rect):
+    """The interval checks GameScene ran over every brick"""
+    hits = []
+    ball_x = ball_rect.x
+    ball_y = ball_rect.y
+    for brick in brick_sprites:
+        brick_x = brick.rect.x
+        brick_y = brick.rect.y
+        if (ball_x >= brick_x and ball_x <= (brick_x + brick.rect.width)) or (
+            (ball_x + globals.BALL_SIZE) >= brick_x
+            and (ball_x + globals.BALL_SIZE) <= (brick_x + brick.rect.width)
+        ):
+            if (ball_y >= brick_y and ball_y <= (brick_y + brick.rect.height)) or (
+                (ball_y + globals.BALL_SIZE) >= brick_y
+                and (ball_y + globals.BALL_SIZE) <= (brick_y + brick.rect.height)
+            ):
+                hits.append(brick)
+    return hits
+
+
+def grid_query(spatial_grid, ball_rect):
+    return [
+        brick
+        for brick in spatial_grid.query(ball_rect)
+        if bricks.rects_touch(brick.rect, ball_rect)
+    ]
+
+
+def time_per_frame(collide, ball_rects):
+    start = time.perf_counter()
+    total_hits = 0
+    for ball_rect in ball_rects:
+        total_hits += len(collide(ball_rect))
+    return (time.perf_counter() - start) / len(ball_rects), total_hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bricks", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ball_rects = [
+        pygame.Rect(
+            rng.randrange(globals.WINDOW_WIDTH - globals.BALL_SIZE),
+            rng.randrange(FIELD_BOTTOM + 100),
+            globals.BALL_SIZE,
+            globals.BALL_SIZE,
+        )
+        for _ in range(args.frames)
+    ]
+
+    print("bricks  linear scan (us)  spatial grid (us)  speed-up")
+    for count in args.bricks:
+        brick_sprites, brick_width, brick_height = make_bricks(count)
+        spatial_grid = spatial.SpatialGrid(brick_width, brick_height * 2)
+        for brick in brick_sprites:
+            spatial_grid.add(brick)
+
+        linear_time, linear_hits = time_per_frame(
+            lambda ball_rect: linear_scan(brick_sprites, ball_rect), ball_rects
+        )
+        grid_time, grid_hits = time_per_frame(
+            lambda ball_rect: grid_query(spatial_grid, ball_rect), ball_rects
+        )
+        if grid_hits < linear_hits:
+            print("warning: spatial grid missed", linear_hits - grid_hits, "hits")
+        print(
+            f"{count:>6}  {linear_time * 1e6:>16.2f}  {grid_time * 1e6:>17.2f}"
+            f"  {linear_time / grid_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Step N independent games in lockstep within one interpreter
+
+Each game owns its GameState, clock and seeded generators, so interleaving
+their frames must give the same outcomes as playing them one at a time.
+The benchmark checks that, then reports the combined frame rate.
+
+    python benchmarks/lockstep_games.py --games 1 8 32
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import headless
+
+
+def make_games(count):
+    games = []
+    for seed in range(count):
+        game = headless.HeadlessGame(headless.RandomPolicy(random.Random(seed)))
+        game.reset(seed)
+        games.append(game)
+    return games
+
+
+def summarize(game):
+    state = game.scene.game_state
+    return (game.scene.game_over, state.player_score, state.ball_dropped, game.frames)
+
+
+def run_lockstep(count, max_frames):
+    """Step every unfinished game once per frame, returning the results and time"""
+    games = make_games(count)
+    running = list(games)
+    start = time.perf_counter()
+    for _ in range(max_frames):
+        running = [game for game in running if not game.step()]
+        if not running:
+            break
+    elapsed = time.perf_counter() - start
+    for game in games:
+        game.scene.quantum_computer.close()
+    return [summarize(game) for game in games], elapsed
+
+
+def run_sequential(count, max_frames):
+    results = []
+    for game in make_games(count):
+        game.run(max_frames)
+        results.append(summarize(game))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    headless.init_headless()
+    print("games  frames/s  matches sequential")
+    for count in args.games:
+        results, elapsed = run_lockstep(count, args.max_frames)
+        total_frames = sum(result[3] for result in results)
+        matches = results == run_sequential(count, args.max_frames)
+        print(count, round(total_frames / elapsed), matches)
+
+
+if __name__ == "__main__":
+    main()
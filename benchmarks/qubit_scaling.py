@@ -0,0 +1,91 @@
+"""Report the game's frame time as a function of the number of qubits
+
+Each qubit count runs in its own process, since the layout constants in
+assets.globals are derived from NUM_QUBITS at import time.
+
+    python benchmarks/qubit_scaling.py --min-qubits 3 --max-qubits 8
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_frames(num_frames, edit_interval):
+    """Step and draw a GameScene off-screen, editing the circuit periodically"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    sys.path.insert(0, ROOT_DIR)
+
+    import pygame
+
+    pygame.init()
+    from assets import globals, scene
+
+    screen = pygame.display.set_mode((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+    scene_manager = scene.SceneManager()
+    game_scene = scene.GameScene()
+    scene_manager.push(game_scene)
+
+    # Cycle through cursor moves and gate placements so the circuit keeps changing
+    edit_keys = [pygame.K_h, pygame.K_s, pygame.K_x, pygame.K_d, pygame.K_RIGHT]
+    frame_times = []
+    for frame in range(num_frames):
+        if frame % edit_interval == 0:
+            game_scene.circuit_grid.handle_input(
+                edit_keys[frame // edit_interval % len(edit_keys)]
+            )
+        start = time.perf_counter()
+        scene_manager.update()
+        scene_manager.draw(screen)
+        frame_times.append(time.perf_counter() - start)
+        # Keep the game running for the whole benchmark
+        game_scene.game_state.reset()
+
+    frame_times.sort()
+    mean = sum(frame_times) / len(frame_times)
+    p95 = frame_times[int(len(frame_times) * 0.95)]
+    print(globals.NUM_QUBITS, round(mean * 1000, 3), round(p95 * 1000, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-qubits", type=int, default=3)
+    parser.add_argument("--max-qubits", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--edit-interval", type=int, default=10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_frames(args.frames, args.edit_interval)
+        return
+
+    print("qubits  mean frame (ms)  p95 frame (ms)")
+    for num_qubits in range(args.min_qubits, args.max_qubits + 1):
+        env = dict(os.environ, QBREAKOUT_NUM_QUBITS=str(num_qubits))
+        output = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--worker",
+                "--frames",
+                str(args.frames),
+                "--edit-interval",
+                str(args.edit_interval),
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        qubits, mean, p95 = output.strip().splitlines()[-1].split()
+        print(f"{qubits:>6}  {mean:>15}  {p95:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Time the quantum, collision and rendering hot paths and compare against a baseline
+
+Every case runs headless and is timed as the median of several repeats.
+Results are written as JSON, and --compare flags the cases that got slower
+than a saved run by more than --threshold, exiting with status 1 if any did.
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+import brick_collision
+from assets import globals, headless, node_types, scene, simulator, spatial, ui
+from assets.circuit_grid import CircuitGridModel, CircuitGridNode
+
+# Functions returning the callable to time, by case name
+CASES = {}
+
+
+def make_model(layout):
+    """A 3 x 16 grid: empty, typical (a few gates and a CNOT), redundant or full
+
+    The redundant grid is the typical one plus what players leave behind:
+    identities, gates undone later on their wire and split rotations.
+    """
+    model = CircuitGridModel(3, 16)
+    if layout == "typical":
+        model.set_node(0, 0, CircuitGridNode(node_types.H))
+        model.set_node(1, 1, CircuitGridNode(node_types.X, ctrl_a=0))
+        model.set_node(2, 2, CircuitGridNode(node_types.Y, np.pi / 4))
+        model.set_node(0, 3, CircuitGridNode(node_types.Z))
+        model.set_node(2, 4, CircuitGridNode(node_types.H))
+    elif layout == "redundant":
+        model = make_model("typical")
+        model.set_node(0, 5, CircuitGridNode(node_types.Z))
+        model.set_node(1, 5, CircuitGridNode(node_types.IDEN))
+        model.set_node(2, 6, CircuitGridNode(node_types.H))
+        model.set_node(0, 8, CircuitGridNode(node_types.X, np.pi / 8))
+        model.set_node(1, 8, CircuitGridNode(node_types.S))
+        model.set_node(0, 9, CircuitGridNode(node_types.X, np.pi / 4))
+        model.set_node(1, 10, CircuitGridNode(node_types.SDG))
+        model.set_node(2, 11, CircuitGridNode(node_types.X, ctrl_a=0))
+        model.set_node(2, 13, CircuitGridNode(node_types.X, ctrl_a=0))
+        model.set_node(1, 14, CircuitGridNode(node_types.IDEN))
+    elif layout == "full":
+        gates = (node_types.X, node_types.Y, node_types.Z, node_types.H)
+        for wire_num in range(model.max_wires):
+            for column_num in range(model.max_columns):
+                gate = gates[(wire_num + column_num) % len(gates)]
+                radians = 0 if gate == node_types.H else column_num * np.pi / 8
+                model.set_node(wire_num, column_num, CircuitGridNode(gate, radians))
+    return model
+
+
+def make_game_scene(layout):
+    """A GameScene whose circuit holds the nodes of make_model(layout)"""
+    game_scene = scene.GameScene(seed=0)
+    model = make_model(layout)
+    for wire_num in range(model.max_wires):
+        for column_num in range(model.max_columns):
+            node = model.get_node(wire_num, column_num)
+            if node:
+                game_scene.circuit_grid.model.set_node(wire_num, column_num, node)
+    game_scene.circuit_grid.update()
+    return game_scene
+
+
+def clear_simulation_caches(quantum_computer):
+    quantum_computer.statevector_cache.entries.clear()
+    compiler = getattr(quantum_computer.simulator, "compiler", None)
+    if compiler:
+        compiler.num_qubits = None
+    quantum_computer.displayed_revision = None
+
+
+def setup_compute_circuit(layout):
+    return make_model(layout).compute_circuit
+
+
+def setup_before_measurement_cold(layout):
+    # Simulated from scratch, as after a cache miss on a new circuit
+    quantum_computer = make_game_scene(layout).quantum_computer
+
+    def run():
+        clear_simulation_caches(quantum_computer)
+        quantum_computer.update_before_measurement()
+
+    return run
+
+
+def setup_before_measurement_edit(layout):
+    # One gate toggled in the middle column, so only part of the grid changes
+    game_scene = make_game_scene(layout)
+    model = game_scene.circuit_grid.model
+    quantum_computer = game_scene.quantum_computer
+    nodes = [model.get_node(1, 8), CircuitGridNode(node_types.H)]
+    nodes = [node or CircuitGridNode(node_types.EMPTY) for node in nodes]
+    edits = [0]
+
+    def run():
+        edits[0] += 1
+        model.set_node(1, 8, nodes[edits[0] % 2])
+        quantum_computer.statevector_cache.entries.clear()
+        quantum_computer.update_before_measurement()
+
+    return run
+
+
+def setup_after_measurement(layout):
+    return make_game_scene(layout).quantum_computer.update_after_measurement
+
+
+def setup_qiskit_simulation(layout, optimize):
+    model = make_model(layout)
+    qiskit_simulator = simulator.QiskitSimulator(optimize)
+
+    def run():
+        qiskit_simulator.get_statevector(model)
+
+    return run
+
+
+def setup_gate_tiles_update(layout):
+    circuit_grid = make_game_scene(layout).circuit_grid
+
+    def run():
+        for gate_tile in circuit_grid.gate_tiles.flat:
+            gate_tile.update()
+
+    return run
+
+
+def setup_game_scene_draw(layout):
+    game_scene = make_game_scene(layout)
+    surface = pygame.Surface((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+    scene_manager = scene.SceneManager()
+
+    def run():
+        surface.fill(globals.BLACK)
+        game_scene.draw(scene_manager, surface)
+
+    return run
+
+
+for setup in (
+    setup_compute_circuit,
+    setup_before_measurement_cold,
+    setup_before_measurement_edit,
+    setup_after_measurement,
+    setup_gate_tiles_update,
+    setup_game_scene_draw,
+):
+    for layout in ("empty", "typical", "full"):
+        name = setup.__name__[len("setup_") :] + "/" + layout
+        CASES[name] = functools.partial(setup, layout)
+
+for layout in ("typical", "redundant"):
+    for optimize in (False, True):
+        name = "qiskit_simulation/" + layout + ("/optimized" if optimize else "")
+        CASES[name] = functools.partial(setup_qiskit_simulation, layout, optimize)
+
+
+def setup_brick_collision(count):
+    brick_sprites, brick_width, brick_height = brick_collision.make_bricks(count)
+    spatial_grid = spatial.SpatialGrid(brick_width, brick_height * 2)
+    for brick in brick_sprites:
+        spatial_grid.add(brick)
+    rng = np.random.default_rng(0)
+    ball_rects = [
+        pygame.Rect(x, y, globals.BALL_SIZE, globals.BALL_SIZE)
+        for x, y in zip(
+            rng.integers(0, globals.WINDOW_WIDTH - globals.BALL_SIZE, 256),
+            rng.integers(0, brick_collision.FIELD_BOTTOM + 100, 256),
+        )
+    ]
+    frames = [0]
+
+    def run():
+        frames[0] += 1
+        brick_collision.grid_query(
+            spatial_grid, ball_rects[frames[0] % len(ball_rects)]
+        )
+
+    return run
+
+
+for count in (50, 500, 5000):
+    CASES["brick_collision/" + str(count)] = functools.partial(
+        setup_brick_collision, count
+    )
+
+
+def setup_draw_statevector_grid():
+    surface = pygame.Surface((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+    return lambda: ui.draw_statevector_grid(surface)
+
+
+def setup_draw_score():
+    surface = pygame.Surface((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+    return lambda: ui.draw_score(surface, 3)
+
+
+CASES["ui/draw_statevector_grid"] = setup_draw_statevector_grid
+CASES["ui/draw_score"] = setup_draw_score
+
+
+def time_case(run, repeats, min_time):
+    """Median, min and max seconds per call over repeats of at least min_time each"""
+    run()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    timings = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings), min(timings), max(timings), number
+
+
+def run_suite(names, repeats, min_time):
+    results = {}
+    for name in names:
+        # Silence the game's diagnostic prints while timing
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            run = CASES[name]()
+            median, fastest, slowest, number = time_case(run, repeats, min_time)
+        results[name] = {
+            "median_us": median * 1e6,
+            "min_us": fastest * 1e6,
+            "max_us": slowest * 1e6,
+            "calls_per_repeat": number,
+        }
+        print(f"{name:<40} {median * 1e6:>12.2f} us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every case against baseline and return the regressions"""
+    regressions = []
+    print()
+    print(f"{'case':<40} {'baseline (us)':>14} {'now (us)':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {'-':>14} {result['median_us']:>12.2f}     new")
+            continue
+        before = baseline[name]["median_us"]
+        after = result["median_us"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40} {before:>14.2f} {after:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="JSON file of a saved run"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as a regression (default 0.2)",
+    )
+    parser.add_argument("--filter", default="", help="only run cases containing this")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument(
+        "--min-time", type=float, default=0.02, help="seconds per repeat at least"
+    )
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    headless.init_headless()
+    results = run_suite(names, args.repeats, args.min_time)
+    report = {
+        "metadata": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "num_qubits": globals.NUM_QUBITS,
+            "simulator_engine": globals.SIMULATOR_ENGINE,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print()
+            print(len(regressions), "regression(s) above", f"{args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
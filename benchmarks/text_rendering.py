@@ -0,0 +1,98 @@
+"""Measure the per-frame time saved by the font registry and text cache
+
+Times the statevector labels and score drawn by GameScene each frame,
+once the old way (fonts loaded from disk and text rendered on every call)
+and once through the cached ui functions.
+
+    python benchmarks/text_rendering.py --frames 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from assets import globals, resources, ui
+
+
+def load_fonts_uncached():
+    """The six fonts the old resources.Font loaded from disk on construction"""
+    sizes = {
+        "gameover": 10,
+        "credit": 2,
+        "replay": 5,
+        "score": 12,
+        "vector": 3,
+        "player": 3,
+    }
+    return {
+        name: resources.load_font("bit5x3.ttf", size * globals.WIDTH_UNIT)
+        for name, size in sizes.items()
+    }
+
+
+def draw_text_uncached(screen, quantum_score):
+    """What ui.draw_statevector_grid and ui.draw_score did before the caches"""
+    fonts = load_fonts_uncached()
+    for i, basis_state in enumerate(globals.BASIS_STATES):
+        text = fonts["vector"].render(basis_state, 1, globals.WHITE)
+        screen.blit(
+            text,
+            (
+                i * globals.STATEVECTOR_WIDTH + text.get_width() / 2,
+                globals.STATEVECTOR_HEIGHT + text.get_height(),
+            ),
+        )
+
+    fonts = load_fonts_uncached()
+    text = fonts["player"].render("Score", 1, globals.GRAY)
+    screen.blit(
+        text,
+        text.get_rect(center=(globals.WINDOW_WIDTH * 0.5, globals.WINDOW_HEIGHT * 0.3)),
+    )
+    text = fonts["score"].render(str(quantum_score), 1, globals.GRAY)
+    screen.blit(
+        text,
+        text.get_rect(
+            center=(globals.WINDOW_WIDTH * 0.51, globals.WINDOW_HEIGHT * 0.4)
+        ),
+    )
+
+
+def draw_text_cached(screen, quantum_score):
+    ui.draw_statevector_grid(screen)
+    ui.draw_score(screen, quantum_score)
+
+
+def time_per_frame(draw, screen, frames):
+    start = time.perf_counter()
+    for frame in range(frames):
+        # The score changes every 60 frames, like a brick hit now and then
+        draw(screen, frame // 60)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+
+    uncached = time_per_frame(draw_text_uncached, screen, args.frames)
+    cached = time_per_frame(draw_text_cached, screen, args.frames)
+    print(f"uncached: {uncached * 1000:.3f} ms/frame")
+    print(f"cached:   {cached * 1000:.3f} ms/frame")
+    print(
+        f"saved:    {(uncached - cached) * 1000:.3f} ms/frame ({uncached / cached:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
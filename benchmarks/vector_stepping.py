@@ -0,0 +1,69 @@
+"""Compare stepping games as sprites one by one with the array-based VectorEnv
+
+Both play the same seeded games with an empty circuit. The final score,
+drops, frame count and measurement counts of every game are checked to match.
+
+    python benchmarks/vector_stepping.py --games 1 64 512
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from assets import headless, vector_env
+
+
+def run_sprites(count, max_frames):
+    results = []
+    start = time.perf_counter()
+    game = headless.HeadlessGame()
+    for seed in range(count):
+        game.reset(seed)
+        game.run(max_frames)
+        state = game.scene.game_state
+        results.append(
+            (state.player_score, state.ball_dropped, game.frames)
+            + tuple(game.scene.quantum_computer.measurement_counts)
+        )
+    return results, time.perf_counter() - start
+
+
+def run_vector(count, max_frames):
+    start = time.perf_counter()
+    env = vector_env.VectorEnv(count, seeds=range(count))
+    for _ in range(max_frames):
+        if env.step().all():
+            break
+    results = np.column_stack(
+        [env.score, env.drops, env.frames, env.measurement_counts]
+    )
+    return [tuple(row) for row in results.tolist()], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[1, 64, 512])
+    parser.add_argument("--max-frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    headless.init_headless()
+    print("games  sprite frames/s  vector frames/s  results match")
+    for count in args.games:
+        sprite_results, sprite_time = run_sprites(count, args.max_frames)
+        vector_results, vector_time = run_vector(count, args.max_frames)
+        total_frames = sum(result[2] for result in sprite_results)
+        print(
+            count,
+            round(total_frames / sprite_time),
+            round(total_frames / vector_time),
+            sprite_results == vector_results,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Precompute the unitary of every circuit grid column the game can look up
+
+The table lists each column of single, rotation, controlled, swap, Toffoli
+and Fredkin gates on distinct wires, with rotations in ROTATION_STEP
+increments. It is written to assets/tables, which is not committed, and
+the NumPy simulator memory-maps it at startup. Columns the table lacks are
+still compiled gate by gate.
+
+    python build_column_table.py --qubits 3
+"""
+
+import argparse
+import os
+import time
+
+from assets import column_table, globals
+
+# Larger tables don't fit in memory: 4 qubits would take about 13 GB
+MAX_QUBITS = 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qubits", type=int, default=globals.NUM_QUBITS)
+    args = parser.parse_args()
+    if not 1 <= args.qubits <= MAX_QUBITS:
+        parser.error("--qubits must be between 1 and " + str(MAX_QUBITS))
+
+    os.makedirs(column_table.TABLE_DIR, exist_ok=True)
+    start = time.perf_counter()
+    count = column_table.build(args.qubits)
+    elapsed = time.perf_counter() - start
+    size = sum(
+        os.path.getsize(path) for path in column_table.get_table_paths(args.qubits)
+    )
+    print(
+        count,
+        "columns,",
+        round(size / 2**20, 1),
+        "MiB in",
+        column_table.TABLE_DIR,
+        "in",
+        round(elapsed, 1),
+        "s",
+    )
+
+
+if __name__ == "__main__":
+    main()
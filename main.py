@@ -1,32 +1,114 @@
 # Import files and libraries
+import time
+
+# Startup is timed from here for --profile-startup
+START_TIME = time.perf_counter()
+
+import argparse
+
 import pygame
 from pygame.locals import *
 from pygame import mixer
-from assets import globals, scene
+from assets import globals, scene, headless, replay, startup
+from assets.profiler import profiler
 
-# Initialise pygame and create window
-pygame.init()
-screen = pygame.display.set_mode((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
-pygame.display.set_caption('Quantum Breakout')
-clock = pygame.time.Clock()
+IMPORTED_TIME = time.perf_counter()
 
-mixer.init()
-mixer.music.load('./assets/8BitAdventure.ogg')
-mixer.music.set_volume(0.9)
-mixer.music.play()
+def main(record_path=None, profile_path=None, profile_startup=False):
+    startup_profile = None
+    if profile_startup:
+        startup_profile = startup.StartupProfile(START_TIME)
+        startup_profile.add("import", START_TIME, IMPORTED_TIME)
+
+    # Initialise pygame and create window
+    start = time.perf_counter()
+    pygame.init()
+    screen = pygame.display.set_mode((globals.WINDOW_WIDTH, globals.WINDOW_HEIGHT))
+    pygame.display.set_caption('Quantum Breakout')
+    clock = pygame.time.Clock()
+    if startup_profile:
+        startup_profile.add("display", start)
 
-def main():
     # initialize game
     scene_manager = scene.SceneManager()
-    scene_manager.push(scene.GameScene())
+    recorder = None
+    if record_path:
+        # Record the first game, saved when it ends or the window is closed
+        recorder = replay.Recorder(record_path)
+    # Show the loading screen at once, and build the game once assets are warm
+    start = time.perf_counter()
+    loading_scene = scene.LoadingScene(lambda: scene.GameScene(recorder=recorder), startup_profile)
+    scene_manager.push(loading_scene)
+    scene_manager.draw(screen)
+    if startup_profile:
+        startup_profile.add("loading screen", start)
+
+    start = time.perf_counter()
+    mixer.init()
+    mixer.music.load('./assets/8BitAdventure.ogg')
+    mixer.music.set_volume(0.9)
+    mixer.music.play()
+    if startup_profile:
+        startup_profile.add("music", start)
+
+    if profile_path:
+        # Time every frame from the start, and write the last ones out on exit
+        profiler.enable()
 
     while not scene_manager.exit:
+        start = time.perf_counter()
         # update game
         scene_manager.update()
         # draw game
         scene_manager.draw(screen)
+        if startup_profile and scene_manager.scenes[-1] is not loading_scene:
+            startup_profile.add("first game frame", start)
+            print("\n".join(startup_profile.report()))
+            startup_profile = None
         # control framerate
         clock.tick(60)
 
+    if recorder:
+        recorder.save()
+    if profile_path:
+        profiler.export(profile_path)
+
+def main_headless(games, max_frames):
+    # Run games without a window at a fixed timestep, as fast as possible
+    headless.init_headless()
+    game = headless.HeadlessGame()
+    total_frames = 0
+    start = time.perf_counter()
+    for i in range(games):
+        game.reset()
+        outcome = game.run(max_frames)
+        total_frames += game.frames
+        print("Game", i, ":", outcome or "unfinished", "after", game.frames, "frames, score", game.scene.game_state.player_score)
+    elapsed = time.perf_counter() - start
+    print(total_frames, "frames in", round(elapsed, 2), "s:", round(total_frames / elapsed), "frames/s")
+
+def main_replay(path):
+    # Replay a recorded game without a window and check it ends the same way
+    headless.init_headless()
+    recording = replay.Recording.load(path)
+    game_scene, elapsed = replay.replay(recording)
+    recorded_time = recording.frames[-1][0] / 1000 if recording.frames else 0
+    print("Replayed", len(recording.frames), "frames in", round(elapsed, 3), "s,", round(recorded_time / elapsed), "x real time")
+    print("Score", game_scene.game_state.player_score, "drops", game_scene.game_state.ball_dropped, ":", game_scene.game_over or "unfinished", "as recorded")
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Quantum Breakout')
+    parser.add_argument('--headless', action='store_true', help='simulate games without a window or sound')
+    parser.add_argument('--games', type=int, default=1, help='number of headless games to run')
+    parser.add_argument('--frames', type=int, default=100000, help='maximum frames per headless game')
+    parser.add_argument('--record', metavar='PATH', help='record the first game to PATH')
+    parser.add_argument('--replay', metavar='PATH', help='replay a recorded game without a window')
+    parser.add_argument('--profile', metavar='PATH', help='profile frames and write the timings to PATH (.csv or .json) on exit')
+    parser.add_argument('--profile-startup', action='store_true', help='print how long each startup stage took once the game is drawn')
+    args = parser.parse_args()
+    if args.replay:
+        main_replay(args.replay)
+    elif args.headless:
+        main_headless(args.games, args.frames)
+    else:
+        main(args.record, args.profile, args.profile_startup)
@@ -0,0 +1,147 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from assets import gates, optimizer
+
+NUM_QUBITS = 3
+
+SINGLE_GATES = ("x", "y", "z", "h", "s", "sdg", "t", "tdg")
+ROTATION_GATES = ("rx", "ry", "rz")
+SELF_INVERSE_GATES = ("cx", "cy", "cz", "ch", "swap")
+
+
+def unitary(operations):
+    matrix = np.eye(2**NUM_QUBITS, dtype=complex)
+    for gate, radians, wires in operations:
+        gates.apply_operation(matrix, NUM_QUBITS, gate, radians, wires)
+    return matrix
+
+
+def assert_equal_up_to_phase(expected, actual):
+    index = np.unravel_index(np.argmax(np.abs(expected)), expected.shape)
+    phase = actual[index] / expected[index]
+    assert abs(abs(phase) - 1) < 1e-9
+    np.testing.assert_allclose(expected * phase, actual, atol=1e-9)
+
+
+def inverse(operation):
+    gate, radians, wires = operation
+    if gate in optimizer.INVERSES:
+        return optimizer.INVERSES[gate], None, wires
+    if radians is not None:
+        return gate, -radians, wires
+    return operation
+
+
+def random_operation(rng):
+    wires = rng.sample(range(NUM_QUBITS), 3)
+    kind = rng.random()
+    if kind < 0.35:
+        return rng.choice(SINGLE_GATES), None, (wires[0],)
+    if kind < 0.6:
+        return rng.choice(ROTATION_GATES), rng.randint(1, 15) * np.pi / 8, (wires[0],)
+    if kind < 0.75:
+        return rng.choice(SELF_INVERSE_GATES), None, (wires[0], wires[1])
+    if kind < 0.9:
+        # Past 2 pi, where crz is not yet the identity
+        return "crz", rng.randint(1, 31) * np.pi / 8, (wires[0], wires[1])
+    return rng.choice(("ccx", "cswap")), None, tuple(wires)
+
+
+def random_operations(rng):
+    """Random gates with inverse pairs, self-inverse pairs and split rotations inserted"""
+    operations = []
+    for _ in range(rng.randint(0, 30)):
+        operation = random_operation(rng)
+        operations.append(operation)
+        kind = rng.random()
+        if kind < 0.2:
+            operations.append(inverse(operation))
+        elif kind < 0.3 and operation[1] is not None:
+            operations.append(operation)
+    return operations
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_operations_keep_unitary(seed):
+    operations = random_operations(random.Random(seed))
+    simplified, removed = optimizer.optimize(operations)
+    assert removed == len(operations) - len(simplified)
+    assert_equal_up_to_phase(unitary(operations), unitary(simplified))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_operations_followed_by_their_inverse_cancel(seed):
+    rng = random.Random(seed)
+    operations = [random_operation(rng) for _ in range(rng.randint(1, 20))]
+    mirrored = operations + [inverse(operation) for operation in reversed(operations)]
+    assert optimizer.optimize(mirrored) == ([], len(mirrored))
+
+
+@pytest.mark.parametrize(
+    "operations, expected",
+    [
+        ([("i", None, (0,)), ("x", None, (1,))], [("x", None, (1,))]),
+        # Gates on other wires commute, so the H pair cancels
+        (
+            [("h", None, (0,)), ("x", None, (1,)), ("h", None, (0,))],
+            [("x", None, (1,))],
+        ),
+        ([("s", None, (2,)), ("sdg", None, (2,))], []),
+        ([("tdg", None, (2,)), ("t", None, (2,))], []),
+        ([("cx", None, (0, 1)), ("cx", None, (0, 1))], []),
+        ([("cz", None, (0, 2)), ("cz", None, (2, 0))], []),
+        ([("swap", None, (0, 1)), ("swap", None, (1, 0))], []),
+        ([("ccx", None, (0, 1, 2)), ("ccx", None, (1, 0, 2))], []),
+        # Removing the inner pair exposes the outer one
+        (
+            [
+                ("x", None, (0,)),
+                ("h", None, (0,)),
+                ("h", None, (0,)),
+                ("x", None, (0,)),
+            ],
+            [],
+        ),
+        ([("rx", 0.25, (0,)), ("rx", 0.5, (0,))], [("rx", 0.75, (0,))]),
+        # A full turn is the identity up to global phase
+        ([("ry", np.pi, (1,)), ("ry", np.pi, (1,))], []),
+        # crz only wraps at 4 pi: 3 pi / 2 + pi is pi / 2 past 2 pi
+        (
+            [("crz", 3 * np.pi / 2, (0, 1)), ("crz", np.pi, (0, 1))],
+            [("crz", -3 * np.pi / 2, (0, 1))],
+        ),
+        ([("crz", 2 * np.pi, (0, 1)), ("crz", 2 * np.pi, (0, 1))], []),
+    ],
+)
+def test_expected_gates_are_removed(operations, expected):
+    simplified, removed = optimizer.optimize(operations)
+    assert [gate for gate, _, _ in simplified] == [gate for gate, _, _ in expected]
+    for (_, radians, wires), (_, expected_radians, expected_wires) in zip(
+        simplified, expected
+    ):
+        assert wires == expected_wires
+        if expected_radians is not None:
+            assert math.isclose(radians, expected_radians)
+    assert removed == len(operations) - len(expected)
+    assert_equal_up_to_phase(unitary(operations), unitary(simplified))
+
+
+@pytest.mark.parametrize(
+    "operations",
+    [
+        # The CNOT between the two H gates acts on their wire
+        [("h", None, (0,)), ("cx", None, (0, 1)), ("h", None, (0,))],
+        [("rx", 0.5, (0,)), ("ry", 0.5, (0,))],
+        [("crz", np.pi, (0, 1)), ("crz", np.pi, (1, 0))],
+        # A full turn of crz is a Z on the control
+        [("crz", 2 * np.pi, (0, 1))],
+    ],
+)
+def test_non_cancelling_gates_are_kept(operations):
+    simplified, removed = optimizer.optimize(operations)
+    assert removed == 0
+    assert simplified == operations
@@ -0,0 +1,112 @@
+import random
+
+import numpy as np
+import pytest
+
+from assets import compiler, globals, node_types, simulator
+from assets.circuit_grid import ROTATION_STEP, CircuitGridModel, CircuitGridNode
+
+pytest.importorskip("qiskit")
+
+# BasicAer warns that it is deprecated on every run
+pytestmark = pytest.mark.filterwarnings("ignore::DeprecationWarning")
+
+NUM_QUBITS = 3
+NUM_COLUMNS = 8
+
+SINGLE_TYPES = (
+    node_types.IDEN,
+    node_types.X,
+    node_types.Y,
+    node_types.Z,
+    node_types.S,
+    node_types.SDG,
+    node_types.T,
+    node_types.TDG,
+    node_types.H,
+)
+ROTATION_TYPES = (node_types.X, node_types.Y, node_types.Z)
+
+
+def random_rotation(rng):
+    return rng.randint(1, 15) * ROTATION_STEP
+
+
+def fill_column(model, column_num, rng):
+    """Put a random single, rotation, controlled or swap configuration in a column"""
+    wires = list(range(NUM_QUBITS))
+    rng.shuffle(wires)
+    kind = rng.random()
+    if kind < 0.2:
+        # Toffoli
+        model.set_node(
+            wires[0],
+            column_num,
+            CircuitGridNode(node_types.X, ctrl_a=wires[1], ctrl_b=wires[2]),
+        )
+        return
+    if kind < 0.3:
+        # Controlled swap
+        model.set_node(
+            wires[0],
+            column_num,
+            CircuitGridNode(node_types.SWAP, ctrl_a=wires[1], swap=wires[2]),
+        )
+        return
+    if kind < 0.4:
+        model.set_node(
+            wires[0], column_num, CircuitGridNode(node_types.SWAP, swap=wires[1])
+        )
+        wires = wires[2:]
+    elif kind < 0.65:
+        node_type = rng.choice((node_types.X, node_types.Y, node_types.Z, node_types.H))
+        # Only Z keeps its control when rotated, as crz
+        radians = (
+            random_rotation(rng)
+            if node_type == node_types.Z and rng.random() < 0.5
+            else 0.0
+        )
+        model.set_node(
+            wires[0], column_num, CircuitGridNode(node_type, radians, ctrl_a=wires[1])
+        )
+        wires = wires[2:]
+    for wire_num in wires:
+        if rng.random() < 0.3:
+            continue
+        if rng.random() < 0.4:
+            node = CircuitGridNode(rng.choice(ROTATION_TYPES), random_rotation(rng))
+        else:
+            node = CircuitGridNode(rng.choice(SINGLE_TYPES))
+        model.set_node(wire_num, column_num, node)
+
+
+def random_model(seed):
+    rng = random.Random(seed)
+    model = CircuitGridModel(NUM_QUBITS, NUM_COLUMNS)
+    for column_num in range(NUM_COLUMNS):
+        fill_column(model, column_num, rng)
+    return model
+
+
+@pytest.mark.parametrize("fused", (True, False))
+@pytest.mark.parametrize("seed", range(60))
+def test_numpy_simulator_matches_qiskit(seed, fused, monkeypatch):
+    # Simulate every gate as drawn, so the amplitudes must match exactly,
+    # including their global phase
+    monkeypatch.setattr(globals, "OPTIMIZE_CIRCUIT", False)
+    model = random_model(seed)
+    expected = simulator.QiskitSimulator().get_statevector(model)
+    numpy_simulator = simulator.NumpySimulator()
+    if not fused:
+        # Propagate the statevector gate by gate, as for larger circuits
+        numpy_simulator.compiler = compiler.CircuitCompiler(fusion_max_qubits=0)
+    actual = numpy_simulator.get_statevector(model)
+    np.testing.assert_allclose(actual, expected, atol=1e-10)
+
+
+def test_random_grids_cover_controls_swaps_and_rotations():
+    gates = set()
+    for seed in range(60):
+        gates.update(gate for gate, _, _ in random_model(seed).compute_operations())
+    assert {"ccx", "cx", "cy", "cz", "crz", "ch", "swap", "cswap"} <= gates
+    assert {"rx", "ry", "rz"} <= gates